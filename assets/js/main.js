@@ -32,4 +32,11 @@
       }
     });
   });
+
+  // Service worker generated by scripts/make_service_worker.py.
+  if('serviceWorker' in navigator){
+    window.addEventListener('load', () => {
+      navigator.serviceWorker.register('/sw.js').catch(() => {});
+    });
+  }
 })();
@@ -0,0 +1,20 @@
+// Click-to-load video players for the facades made by scripts/video_facades.py.
+(function(){
+  document.querySelectorAll('a.video-facade[data-embed]').forEach((facade) => {
+    facade.addEventListener('click', (e) => {
+      // Let modified clicks open the video in a new tab as a plain link.
+      if(e.metaKey || e.ctrlKey || e.shiftKey || e.altKey || e.button !== 0) return;
+      e.preventDefault();
+
+      const frame = document.createElement('iframe');
+      frame.className = 'video-facade-frame';
+      frame.src = facade.dataset.embed;
+      frame.title = facade.dataset.title || 'Embedded video';
+      frame.style.aspectRatio = facade.style.aspectRatio;
+      frame.allow = 'accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share';
+      frame.allowFullscreen = true;
+      facade.replaceWith(frame);
+      frame.focus();
+    });
+  });
+})();
@@ -3,29 +3,120 @@
 
 Usage:
   python scripts/build_articles.py
+  python scripts/build_articles.py --fail-on-budget
+  python scripts/build_articles.py --resume
+  python scripts/build_articles.py --bundle dist/site.tar.gz
+  python scripts/build_articles.py --bundle dist/site.tar.gz --no-write
+  python scripts/build_articles.py --markdown-backend builtin
+  python scripts/build_articles.py --inline-images-under 4096
+  python scripts/build_articles.py --legacy-images
 """
 from __future__ import annotations
 
+import argparse
 import datetime as dt
+import hashlib
 import html
+import importlib
 import json
 import re
-import subprocess
+import signal
 import sys
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from deploy_manifest import BUNDLE_SUFFIXES, is_deployable
+from generate_articles_index import mark_draft_links, scan_meta, speculation_rules_script
+from git_dates import first_commit_date, forget_worktree_status, last_modified_date
+from inline_images import inline_small_images
+from make_bundle import bundle_site
+from make_redirects import Rule, build_rules, load_rules, render_rules, rewrite_links, write_redirects
+from page_budget import local_file
+from prune_css import prune_page
+from subset_fonts import font_head
+from site_io import CACHE_DIR, capture_outputs, load_json_cache, save_json_cache, write_if_changed, writes_tree
+from video_facades import FACADE_HEAD, FACADE_MARK, facade_html, facade_version
+
+try:
+    import pygments
+    from pygments import highlight as pygments_highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:  # required by the build (see check_highlighter); importers may go without
+    pygments = None
 
 ROOT = Path(__file__).resolve().parents[1]
 ARTICLES_DIR = ROOT / "articles"
 SITE_NAME = "Scott Labbe"
 TITLE_SEPARATOR = " | "
+# Per-article guards: fail the build with a clear message rather than hang or
+# ship a runaway page if a source trips a pathological path in the renderer.
+MAX_SOURCE_BYTES = 5 * 1024 * 1024
+MAX_RENDERED_BYTES = 10 * 1024 * 1024
+MAX_RENDER_SECONDS = 20.0
+HIGHLIGHT_STYLE = "friendly"
+PYGMENTS_VERSION = "2.19.2"  # keep in step with requirements.txt
+HIGHLIGHT_CSS = ROOT / "assets" / "css" / "highlight.css"
+# Pipeline stages run after the article pages, in order. _redirects is
+# written before the pages (see main), so links use this build's rules.
+STAGES = [
+    "enhance_legacy_articles_seo.py",
+    "generate_articles_index.py",
+    "subset_fonts.py",
+    "prune_css.py",
+    "make_service_worker.py",
+    "make_headers.py",
+    "make_sitemap.py",
+    "page_budget.py",
+]
+JOURNAL_VERSION = "1"
 
 FENCE_RE = re.compile(r"^```([\w+-]*)\s*$")
-HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*$")
-UL_RE = re.compile(r"^\s*[-*]\s+(.+?)\s*$")
-OL_RE = re.compile(r"^\s*\d+\.\s+(.+?)\s*$")
+# Captured text keeps trailing whitespace (callers strip it); a lazy
+# "(.+?)\s*$" is quadratic on lines with long interior whitespace runs.
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.+)$")
+UL_RE = re.compile(r"^\s*[-*]\s+(.+)$")
+OL_RE = re.compile(r"^\s*\d+\.\s+(.+)$")
 FRONT_MATTER_RE = re.compile(r"\A---\s*\n(.*?)\n---\s*\n?", re.DOTALL)
 CHAT_KEY_RE = re.compile(r"^([a-z_]+)\s*:\s*(.*)$", re.IGNORECASE)
+LONE_LINK_HTML_RE = re.compile(r'<a href="([^"]*)">([^<]*)</a>')
 RAW_IMG_RE = re.compile(r"^<img\b[^>]*>\s*$", re.IGNORECASE)
+PLACEHOLDER_RE = re.compile(r"@@P(\d+)@@")
+# Files an article source refers to: markdown and raw images, chat images and
+# chat transcripts. Their stamps go into the --resume step digest.
+SOURCE_IMAGE_RE = re.compile(r"!\[[^\]]*\]\(([^)\s]+)|<img\b[^>]*\bsrc=\"([^\"]+)\"", re.IGNORECASE)
+SOURCE_CHAT_FILE_RE = re.compile(
+    r"^\s*(transcript|image|user_image|model_image)\s*:\s*(\S.*?)\s*$", re.IGNORECASE | re.MULTILINE
+)
+
+
+class RenderGuardError(RuntimeError):
+    pass
+
+
+@contextmanager
+def render_deadline(seconds: float, label: str) -> Iterator[None]:
+    def expired(signum: int, frame: object) -> None:
+        raise RenderGuardError(f"{label}: rendering took longer than {seconds:g}s")
+
+    use_alarm = hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, expired)
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    # Without SIGALRM (Windows, worker threads) the limit is checked afterwards.
+    if time.monotonic() - started > seconds:
+        raise RenderGuardError(f"{label}: rendering took longer than {seconds:g}s")
 
 
 def parse_front_matter(text: str) -> tuple[dict[str, str], str]:
@@ -68,6 +159,37 @@ def strip_leading_h1(text: str) -> str:
     return text
 
 
+def sub_bracketed(text: str, opener: str, allow_empty_label: bool, repl) -> str:
+    # Linear-time equivalent of re.sub(r"OPENER([^\]]+)\]\(([^)]+)\)", ...).
+    # The regex rescans to the end of the text for every unmatched opener,
+    # which is quadratic on input such as thousands of stray "[".
+    out: list[str] = []
+    pos = 0
+    start = text.find(opener)
+    close = -1
+    paren = -1
+    while start != -1:
+        label_start = start + len(opener)
+        if close < label_start:
+            close = text.find("]", label_start)
+            if close == -1:
+                break
+        if (close > label_start or allow_empty_label) and text.startswith("(", close + 1):
+            if paren < close + 2:
+                paren = text.find(")", close + 2)
+                if paren == -1:
+                    break
+            if paren > close + 2:
+                out.append(text[pos:start])
+                out.append(repl(text[label_start:close], text[close + 2 : paren]))
+                pos = paren + 1
+                start = text.find(opener, pos)
+                continue
+        start = text.find(opener, start + 1)
+    out.append(text[pos:])
+    return "".join(out)
+
+
 def render_inlines(raw: str) -> str:
     placeholders: list[str] = []
 
@@ -82,54 +204,69 @@ def render_inlines(raw: str) -> str:
 
     escaped = re.sub(r"`([^`]+)`", code_sub, escaped)
 
-    def img_sub(m: re.Match[str]) -> str:
-        alt = m.group(1).strip()
-        src = m.group(2).strip()
+    def img_sub(alt: str, src: str) -> str:
+        alt = alt.strip()
+        src = src.strip()
         return stash(f'<img src="{html.escape(src, quote=True)}" alt="{html.escape(alt, quote=True)}" />')
 
-    escaped = re.sub(r"!\[([^\]]*)\]\(([^)]+)\)", img_sub, escaped)
+    escaped = sub_bracketed(escaped, "![", True, img_sub)
 
-    def link_sub(m: re.Match[str]) -> str:
-        text = m.group(1).strip()
-        href = m.group(2).strip()
+    def link_sub(text: str, href: str) -> str:
+        text = text.strip()
+        href = href.strip()
         return stash(f'<a href="{html.escape(href, quote=True)}">{text}</a>')
 
-    escaped = re.sub(r"\[([^\]]+)\]\(([^)]+)\)", link_sub, escaped)
+    escaped = sub_bracketed(escaped, "[", False, link_sub)
     escaped = re.sub(r"\*\*([^*]+)\*\*", r"<strong>\1</strong>", escaped)
     escaped = re.sub(r"\*([^*]+)\*", r"<em>\1</em>", escaped)
 
-    for i, ph in enumerate(placeholders):
-        escaped = escaped.replace(f"@@P{i}@@", ph)
-    return escaped
+    def restore(text: str, limit: int) -> str:
+        # Link text can itself hold earlier stashed code or images, so resolve
+        # nested placeholders too; one regex pass per level keeps this linear.
+        def sub(m: re.Match[str]) -> str:
+            idx = int(m.group(1))
+            if idx >= limit:
+                return m.group(0)
+            return restore(placeholders[idx], idx)
+
+        return PLACEHOLDER_RE.sub(sub, text)
+
+    return restore(escaped, len(placeholders))
+
+
+CHAT_FIELDS = {
+    "user",
+    "model",
+    "image",
+    "user_image",
+    "model_image",
+    "user_label",
+    "model_label",
+    "transcript",
+    "limit",
+}
+TRANSCRIPT_USER_ROLES = {"user", "human"}
+TRANSCRIPT_MODEL_ROLES = {"model", "assistant", "ai"}
 
 
 def parse_chat_block(lines: list[str]) -> dict[str, str] | None:
-    fields: dict[str, str] = {}
+    # Values are accumulated as lists of pieces and joined once at the end;
+    # repeated str += on dict values is quadratic for long transcripts.
+    fields: dict[str, list[str]] = {}
     current_key: str | None = None
-    allowed = {
-        "user",
-        "model",
-        "image",
-        "user_image",
-        "model_image",
-        "user_label",
-        "model_label",
-    }
 
     for raw in lines:
         line = raw.rstrip()
         if not line.strip():
             if current_key and current_key in fields and current_key != "image":
-                fields[current_key] += "\n"
+                fields[current_key].append("\n")
             continue
 
         if raw.startswith("  ") and current_key:
             continuation = raw[2:].rstrip()
             if continuation:
-                if fields[current_key]:
-                    fields[current_key] += f"\n{continuation}"
-                else:
-                    fields[current_key] = continuation
+                pieces = fields[current_key]
+                pieces.append(f"\n{continuation}" if pieces else continuation)
             continue
 
         match = CHAT_KEY_RE.match(line.strip())
@@ -138,65 +275,311 @@ def parse_chat_block(lines: list[str]) -> dict[str, str] | None:
 
         key = match.group(1).lower()
         value = match.group(2).strip()
-        if key in allowed:
-            fields[key] = value
+        if key in CHAT_FIELDS:
+            fields[key] = [value] if value else []
             current_key = key
         else:
             current_key = None
 
-    if not fields.get("user") or not fields.get("model"):
+    joined = {key: "".join(pieces) for key, pieces in fields.items()}
+    if joined.get("transcript"):
+        return joined
+    if not joined.get("user") or not joined.get("model"):
         return None
-    return fields
+    return joined
+
+
+def render_chat_paragraphs(parts: Iterable[str]) -> str:
+    return "".join(f"<p>{render_inlines(part)}</p>" for part in parts)
 
 
 def render_chat_text(raw: str) -> str:
-    parts = [p.strip() for p in re.split(r"\n\s*\n", raw.strip()) if p.strip()]
-    if not parts:
-        return ""
-    return "".join(f"<p>{render_inlines(part.replace(chr(10), ' ').strip())}</p>" for part in parts)
+    parts = (p.strip().replace("\n", " ") for p in re.split(r"\n\s*\n", raw.strip()))
+    return render_chat_paragraphs(p for p in parts if p)
+
+
+def render_chat_image(src: str, alt: str) -> str:
+    return f'\n      <img src="{html.escape(src, quote=True)}" alt="{alt}" class="chat-image" loading="lazy" />'
+
+
+def render_chat_row(side: str, label: str, body_html: str) -> str:
+    return (
+        f'  <div class="chat-row chat-row-{side}">\n'
+        f'    <div class="chat-bubble chat-bubble-{side}">\n'
+        f'      <p class="chat-label">{label}</p>\n'
+        f"{body_html}\n"
+        "    </div>\n"
+        "  </div>\n"
+    )
+
+
+def chat_labels(fields: dict[str, str]) -> tuple[str, str]:
+    user_label = html.escape(fields.get("user_label", "User").strip() or "User")
+    model_label = html.escape(fields.get("model_label", "Assistant").strip() or "Assistant")
+    return user_label, model_label
 
 
 def render_chat_block(fields: dict[str, str]) -> str:
     user_html = render_chat_text(fields["user"])
     model_html = render_chat_text(fields["model"])
-    user_label = html.escape(fields.get("user_label", "User").strip() or "User")
-    model_label = html.escape(fields.get("model_label", "Assistant").strip() or "Assistant")
+    user_label, model_label = chat_labels(fields)
     user_image_src = fields.get("user_image", "").strip()
     model_image_src = fields.get("model_image", "").strip() or fields.get("image", "").strip()
 
-    user_image_html = ""
     if user_image_src:
-        user_image_html = (
-            f'\n      <img src="{html.escape(user_image_src, quote=True)}" '
-            'alt="User uploaded image" class="chat-image" loading="lazy" />'
-        )
-
-    model_image_html = ""
+        user_html += render_chat_image(user_image_src, "User uploaded image")
     if model_image_src:
-        model_image_html = (
-            f'\n      <img src="{html.escape(model_image_src, quote=True)}" '
-            'alt="Model response image" class="chat-image" loading="lazy" />'
-        )
+        model_html += render_chat_image(model_image_src, "Model response image")
 
     return (
         '<section class="chat-example">\n'
-        '  <div class="chat-row chat-row-user">\n'
-        '    <div class="chat-bubble chat-bubble-user">\n'
-        f'      <p class="chat-label">{user_label}</p>\n'
-        f'{user_html}{user_image_html}\n'
-        '    </div>\n'
-        "  </div>\n"
-        '  <div class="chat-row chat-row-model">\n'
-        '    <div class="chat-bubble chat-bubble-model">\n'
-        f'      <p class="chat-label">{model_label}</p>\n'
-        f'{model_html}{model_image_html}\n'
-        '    </div>\n'
-        "  </div>\n"
+        f"{render_chat_row('user', user_label, user_html)}"
+        f"{render_chat_row('model', model_label, model_html)}"
         "</section>"
     )
 
 
-def render_markdown(md_text: str) -> str:
+def transcript_text(content: object) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        # Content-part lists: [{"type": "text", "text": "..."}, ...]
+        return "\n\n".join(
+            str(part.get("text", "")) for part in content if isinstance(part, dict) and part.get("text")
+        )
+    return ""
+
+
+def iter_transcript_turns(path: Path) -> Iterator[tuple[str, str, str]]:
+    with path.open(encoding="utf-8") as fh:
+        for lineno, raw in enumerate(fh, 1):
+            if not raw.strip():
+                continue
+            try:
+                turn = json.loads(raw)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"{path}:{lineno}: invalid JSON in chat transcript: {exc.msg}") from None
+            if not isinstance(turn, dict):
+                continue
+            role = str(turn.get("role", "")).lower()
+            if role in TRANSCRIPT_USER_ROLES:
+                side = "user"
+            elif role in TRANSCRIPT_MODEL_ROLES:
+                side = "model"
+            else:
+                continue
+            text = transcript_text(turn.get("content", turn.get("text", "")))
+            yield side, text, str(turn.get("image", "") or "").strip()
+
+
+def render_transcript_text(text: str) -> str:
+    paragraphs = (" ".join(p.split()) for p in re.split(r"\n\s*\n", text))
+    return render_chat_paragraphs(p for p in paragraphs if p)
+
+
+def transcript_path(fields: dict[str, str], base_dir: Path | None) -> Path:
+    path = Path(fields["transcript"].strip())
+    if not path.is_absolute():
+        path = (base_dir or Path.cwd()) / path
+    return path
+
+
+def render_chat_transcript(fields: dict[str, str], base_dir: Path | None) -> str:
+    path = transcript_path(fields, base_dir)
+    if not path.is_file():
+        raise FileNotFoundError(f"chat transcript not found: {path}")
+    limit_raw = fields.get("limit", "").strip()
+    limit = int(limit_raw) if limit_raw.isdigit() else 0
+    user_label, model_label = chat_labels(fields)
+
+    shown: list[str] = []
+    hidden: list[str] = []
+    # Each side of the current exchange collects rendered HTML pieces, so a
+    # turn is rendered once as it streams in and joined when the exchange ends.
+    exchange: dict[str, list[str]] = {"user": [], "model": []}
+
+    def flush() -> None:
+        rows = [
+            render_chat_row(side, label, "".join(exchange[side]))
+            for side, label in (("user", user_label), ("model", model_label))
+            if exchange[side]
+        ]
+        if not rows:
+            return
+        target = hidden if limit and len(shown) >= limit else shown
+        target.append('<section class="chat-example">\n' + "".join(rows) + "</section>")
+        exchange["user"] = []
+        exchange["model"] = []
+
+    for side, text, image in iter_transcript_turns(path):
+        if side == "user" and exchange["model"]:
+            flush()
+        body = render_transcript_text(text)
+        if body:
+            exchange[side].append(body)
+        if image:
+            alt = "User uploaded image" if side == "user" else "Model response image"
+            exchange[side].append(render_chat_image(image, alt))
+    flush()
+
+    if hidden:
+        noun = "exchange" if len(hidden) == 1 else "exchanges"
+        shown.append(
+            '<details class="chat-more">\n'
+            f"<summary>Show {len(hidden)} more {noun}</summary>\n"
+            + "\n".join(hidden)
+            + "\n</details>"
+        )
+    return "\n".join(shown)
+
+
+_highlight_cache: dict[str, str] | None = None
+
+
+def highlight_cache_version() -> str:
+    return f"pygments-{pygments.__version__}-{HIGHLIGHT_STYLE}" if pygments else "none"
+
+
+def check_highlighter() -> None:
+    # Highlighted spans are committed in the article pages, so a build with
+    # no Pygments, or another version, would silently rewrite every page
+    # with code. requirements.txt pins the version the pages were built with.
+    if pygments is None:
+        sys.exit("Build failed: code highlighting needs Pygments (pip install -r requirements.txt)")
+    if pygments.__version__ != PYGMENTS_VERSION:
+        print(
+            f"Warning: Pygments {pygments.__version__} is installed but the pages are built with "
+            f"{PYGMENTS_VERSION} (requirements.txt); highlighted code may change.",
+            file=sys.stderr,
+        )
+
+
+def highlight_code(code: str, lang: str) -> str | None:
+    # Highlighted spans are cached per (language, code hash) across builds,
+    # so unchanged blocks are never re-tokenized.
+    global _highlight_cache
+    if pygments is None or not lang:
+        return None
+    if _highlight_cache is None:
+        _highlight_cache = load_json_cache("highlight", highlight_cache_version())
+    key = f"{lang.lower()}:{hashlib.sha256(code.encode('utf-8')).hexdigest()}"
+    if key not in _highlight_cache:
+        try:
+            lexer = get_lexer_by_name(lang.lower(), stripnl=False, ensurenl=False)
+        except ClassNotFound:
+            return None
+        _highlight_cache[key] = pygments_highlight(code, lexer, HtmlFormatter(nowrap=True))
+    return _highlight_cache[key]
+
+
+def save_highlight_cache() -> None:
+    if _highlight_cache is not None:
+        save_json_cache("highlight", highlight_cache_version(), _highlight_cache)
+
+
+def write_highlight_css() -> bool:
+    if pygments is None:
+        return False
+    rules = HtmlFormatter(style=HIGHLIGHT_STYLE).get_token_style_defs(".highlight")
+    css = "/* Generated by scripts/build_articles.py from the Pygments \"" + HIGHLIGHT_STYLE + "\" style. */\n"
+    return write_if_changed(HIGHLIGHT_CSS, css + "\n".join(rules) + "\n")
+
+
+def wrap_paragraph(inner_html: str, image_pair: bool) -> str:
+    # Renderer hook: two images alone in a paragraph sit side by side, and a
+    # lone link to a video embed URL becomes a click-to-load facade.
+    video = LONE_LINK_HTML_RE.fullmatch(inner_html)
+    if video:
+        facade = facade_html(html.unescape(video.group(1)), html.unescape(video.group(2)))
+        if facade:
+            return facade
+    if image_pair:
+        return f'<p class="image-pair">{inner_html}</p>'
+    return f"<p>{inner_html}</p>"
+
+
+def render_paragraph(paragraph: str) -> str:
+    image_pair = re.fullmatch(r"(?:!\[[^\]]*\]\([^)]+\)\s*){2}", paragraph) is not None
+    return wrap_paragraph(render_inlines(paragraph), image_pair)
+
+
+def render_fence(lang: str, lines: list[str], base_dir: Path | None) -> str:
+    # Renderer hook for fenced blocks: chat examples, transcripts and code.
+    block = "\n".join(lines)
+    if lang.lower() == "chat":
+        chat_fields = parse_chat_block(lines)
+        if chat_fields and chat_fields.get("transcript"):
+            # Cached per fence and transcript file stamp, so an edited
+            # transcript is rendered again.
+            return render_block(
+                "transcript",
+                block,
+                lambda: render_chat_transcript(chat_fields, base_dir),
+                deps=[transcript_path(chat_fields, base_dir)],
+            )
+        if chat_fields:
+            return render_block("chat", block, lambda: render_chat_block(chat_fields))
+    return render_block(f"code:{lang}", block, lambda: render_code_block(block, lang))
+
+
+def render_code_block(code: str, lang: str) -> str:
+    lang_attr = f' class="language-{lang}"' if lang else ""
+    highlighted = highlight_code(code, lang)
+    if highlighted is None:
+        return f"<pre><code{lang_attr}>{html.escape(code)}</code></pre>"
+    return f'<pre class="highlight"><code{lang_attr}>{highlighted}</code></pre>'
+
+
+_block_cache: dict[str, str] | None = None
+_block_cache_used: set[str] = set()
+block_cache_stats = {"hits": 0, "misses": 0}
+
+
+def block_cache_version() -> str:
+    # Any change to the renderer, the highlighter or the video facades (and
+    # their thumbnails) invalidates every block.
+    source = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+    return f"{source}-{highlight_cache_version()}-{facade_version()}"
+
+
+def load_block_cache() -> None:
+    global _block_cache
+    if _block_cache is None:
+        _block_cache = load_json_cache("blocks", block_cache_version())
+
+
+def save_block_cache() -> None:
+    # Only blocks seen in this build are kept, so edited-away blocks age out.
+    if _block_cache is not None:
+        entries = {k: v for k, v in _block_cache.items() if k in _block_cache_used}
+        save_json_cache("blocks", block_cache_version(), entries)
+
+
+def file_stamp(path: Path) -> str:
+    try:
+        stat = path.stat()
+    except OSError:
+        return f"{path}:missing"
+    return f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def render_block(kind: str, source: str, render: Callable[[], str], deps: Iterable[Path] = ()) -> str:
+    # Rendered HTML per (kind, raw source and the stamps of any files the
+    # block reads), when the block cache is loaded.
+    if _block_cache is None:
+        return render()
+    source = "\n".join([source, *(file_stamp(path) for path in deps)])
+    key = f"{kind}:{hashlib.sha256(source.encode('utf-8')).hexdigest()}"
+    _block_cache_used.add(key)
+    if key in _block_cache:
+        block_cache_stats["hits"] += 1
+        return _block_cache[key]
+    block_cache_stats["misses"] += 1
+    _block_cache[key] = render()
+    return _block_cache[key]
+
+
+def render_markdown(md_text: str, base_dir: Path | None = None) -> str:
     lines = md_text.splitlines()
     out: list[str] = []
     para: list[str] = []
@@ -211,10 +594,7 @@ def render_markdown(md_text: str) -> str:
         nonlocal para
         if para:
             paragraph = " ".join(para).strip()
-            if re.fullmatch(r"(?:!\[[^\]]*\]\([^)]+\)\s*){2}", paragraph):
-                out.append(f'<p class="image-pair">{render_inlines(paragraph)}</p>')
-            else:
-                out.append(f"<p>{render_inlines(paragraph)}</p>")
+            out.append(render_block("paragraph", paragraph, lambda: render_paragraph(paragraph)))
             para = []
 
     def close_lists() -> None:
@@ -239,17 +619,7 @@ def render_markdown(md_text: str) -> str:
             close_lists()
             close_blockquote()
             if in_code:
-                block = "\n".join(code)
-                if code_lang.lower() == "chat":
-                    chat_fields = parse_chat_block(code)
-                    if chat_fields:
-                        out.append(render_chat_block(chat_fields))
-                    else:
-                        lang_attr = f' class="language-{code_lang}"' if code_lang else ""
-                        out.append(f"<pre><code{lang_attr}>{html.escape(block)}</code></pre>")
-                else:
-                    lang_attr = f' class="language-{code_lang}"' if code_lang else ""
-                    out.append(f"<pre><code{lang_attr}>{html.escape(block)}</code></pre>")
+                out.append(render_fence(code_lang, code, base_dir))
                 code = []
                 code_lang = ""
                 in_code = False
@@ -292,7 +662,8 @@ def render_markdown(md_text: str) -> str:
             close_lists()
             close_blockquote()
             level = len(heading.group(1))
-            out.append(f"<h{level}>{render_inlines(heading.group(2).strip())}</h{level}>")
+            text = heading.group(2).strip()
+            out.append(render_block(f"h{level}", text, lambda: f"<h{level}>{render_inlines(text)}</h{level}>"))
             continue
 
         if stripped.startswith(">"):
@@ -302,7 +673,7 @@ def render_markdown(md_text: str) -> str:
                 out.append("<blockquote>")
                 in_blockquote = True
             quote_text = stripped.lstrip(">").strip()
-            out.append(f"<p>{render_inlines(quote_text)}</p>")
+            out.append(render_block("blockquote", quote_text, lambda: f"<p>{render_inlines(quote_text)}</p>"))
             continue
         close_blockquote()
 
@@ -315,7 +686,8 @@ def render_markdown(md_text: str) -> str:
             if not in_ul:
                 out.append("<ul>")
                 in_ul = True
-            out.append(f"<li>{render_inlines(ul.group(1).strip())}</li>")
+            item = ul.group(1).strip()
+            out.append(render_block("li", item, lambda: f"<li>{render_inlines(item)}</li>"))
             continue
 
         ol = OL_RE.match(line)
@@ -327,7 +699,8 @@ def render_markdown(md_text: str) -> str:
             if not in_ol:
                 out.append("<ol>")
                 in_ol = True
-            out.append(f"<li>{render_inlines(ol.group(1).strip())}</li>")
+            item = ol.group(1).strip()
+            out.append(render_block("li", item, lambda: f"<li>{render_inlines(item)}</li>"))
             continue
 
         para.append(stripped)
@@ -338,6 +711,17 @@ def render_markdown(md_text: str) -> str:
     return "\n".join(out)
 
 
+MARKDOWN_BACKENDS: dict[str, Callable[[str, Path | None], str]] = {
+    "builtin": render_markdown,
+}
+
+
+def markdown_backend(name: str) -> Callable[[str, Path | None], str]:
+    if name not in MARKDOWN_BACKENDS:
+        raise ValueError(f"unknown markdown backend {name!r}; choose from {', '.join(MARKDOWN_BACKENDS)}")
+    return MARKDOWN_BACKENDS[name]
+
+
 def parse_date(meta: dict[str, str], src: Path) -> dt.date:
     raw = meta.get("date", "").strip()
     if raw:
@@ -346,7 +730,7 @@ def parse_date(meta: dict[str, str], src: Path) -> dt.date:
                 return dt.datetime.strptime(raw, fmt).date()
             except ValueError:
                 pass
-    return dt.datetime.fromtimestamp(src.stat().st_mtime).date()
+    return first_commit_date(src)
 
 
 def to_plain_text(html_fragment: str) -> str:
@@ -449,8 +833,17 @@ def article_template(
     slug: str,
     summary: str,
     status: str,
+    speculation: str = "",
+    modified: dt.date | None = None,
 ) -> str:
     pub_display = published.isoformat()
+    modified_display = max(published, modified or published).isoformat()
+    highlight_css = (
+        '\n  <link rel="stylesheet" href="/assets/css/highlight.css" />'
+        if '<pre class="highlight">' in article_html
+        else ""
+    )
+    video_head = f"\n  {FACADE_HEAD}" if FACADE_MARK in article_html else ""
     canonical = f"https://scottlabbe.me/articles/{slug}/"
     json_ld = json.dumps(
         {
@@ -463,7 +856,7 @@ def article_template(
                 "name": "Scott Labbe",
             },
             "datePublished": pub_display,
-            "dateModified": pub_display,
+            "dateModified": modified_display,
             "mainEntityOfPage": canonical,
             "url": canonical,
             "publisher": {
@@ -490,11 +883,10 @@ def article_template(
   <meta name="twitter:card" content="summary" />
   <meta name="twitter:title" content="{html.escape(title, quote=True)}" />
   <meta name="twitter:description" content="{html.escape(summary, quote=True)}" />
-  <link rel="preconnect" href="https://fonts.googleapis.com">
-  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-  <link href="https://fonts.googleapis.com/css2?family=Libre+Baskerville:ital,wght@0,400;0,700;1,400&family=Space+Mono:ital,wght@0,400;0,700;1,400&display=swap" rel="stylesheet">
-  <link rel="stylesheet" href="/assets/css/main.css" />
-  <script type="application/ld+json">{json_ld}</script>
+  {font_head()}
+  <link rel="stylesheet" href="/assets/css/main.css" />{highlight_css}
+  <script src="/assets/js/main.js" defer></script>
+  <script type="application/ld+json">{json_ld}</script>{speculation}{video_head}
   <style>
     body {{
       background-color: #FDF5E6;
@@ -626,6 +1018,15 @@ def article_template(
       border-radius: 8px;
       border: 1px solid rgba(0,0,0,0.12);
     }}
+    .chat-more {{
+      margin: 1.2rem 0;
+    }}
+    .chat-more summary {{
+      cursor: pointer;
+      font-family: 'Space Mono', monospace;
+      font-size: 0.9rem;
+      color: #2D5D4B;
+    }}
     p.image-pair {{
       display: grid;
       grid-template-columns: 1fr 1fr;
@@ -666,16 +1067,64 @@ def article_template(
 """
 
 
-def build_one(md_path: Path) -> str:
+def article_status(meta: dict[str, str]) -> str:
+    return meta.get("status", "published").strip().lower() or "published"
+
+
+def draft_slugs(md_files: list[Path]) -> set[str]:
+    # Speculation rules may only target pages readers can reach, so links to
+    # drafts (from front matter, or article:status on legacy pages) are marked
+    # for the shared rule to skip.
+    slugs: set[str] = set()
+    md_slugs = {p.parent.name for p in md_files}
+    for md_path in md_files:
+        meta, _ = parse_front_matter(md_path.read_text(encoding="utf-8"))
+        if article_status(meta) == "draft":
+            slugs.add(md_path.parent.name)
+    for html_path in ARTICLES_DIR.glob("*/index.html"):
+        slug = html_path.parent.name
+        if slug in md_slugs or slug == "data" or slug.startswith("."):
+            continue
+        if scan_meta(html_path)[3] == "draft":
+            slugs.add(slug)
+    return slugs
+
+
+def build_one(
+    md_path: Path,
+    drafts: set[str] | None = None,
+    backend: str = "builtin",
+    inline_limit: int = 0,
+    link_rules: list[Rule] | None = None,
+) -> tuple[str, bool, int, int]:
+    label = f"articles/{md_path.parent.name}/{md_path.name}"
+    size = md_path.stat().st_size
+    if size > MAX_SOURCE_BYTES:
+        raise RenderGuardError(f"{label}: source is {size} bytes, over the {MAX_SOURCE_BYTES}-byte limit")
     text = md_path.read_text(encoding="utf-8")
     meta, body = parse_front_matter(text)
     title = meta.get("title", "").strip() or first_h1(body) or md_path.parent.name
-    status = meta.get("status", "published").strip().lower() or "published"
+    status = article_status(meta)
     content = strip_leading_h1(body)
     published = parse_date(meta, md_path)
     slug = md_path.parent.name
-    rendered = render_markdown(content)
+    with render_deadline(MAX_RENDER_SECONDS, label):
+        try:
+            rendered = markdown_backend(backend)(content, md_path.parent)
+        except (OSError, ValueError) as exc:
+            # A chat transcript that is missing, unreadable or not JSONL.
+            raise RenderGuardError(f"{label}: {exc}") from None
+    rendered, rewritten = rewrite_links(rendered, load_rules() if link_rules is None else link_rules)
+    if drafts is not None:
+        rendered = mark_draft_links(rendered, f"/articles/{slug}/", drafts)
+    rendered_bytes = len(rendered.encode("utf-8"))
+    if rendered_bytes > MAX_RENDERED_BYTES:
+        raise RenderGuardError(
+            f"{label}: rendered HTML is {rendered_bytes} bytes, over the {MAX_RENDERED_BYTES}-byte limit"
+        )
     summary = summarize(meta=meta, article_html=rendered, title=title)
+    out = md_path.parent / "index.html"
+    rendered, inlined = inline_small_images(rendered, out, inline_limit)
     html_text = article_template(
         title=title,
         published=published,
@@ -683,24 +1132,191 @@ def build_one(md_path: Path) -> str:
         slug=slug,
         summary=summary,
         status=status,
+        speculation="\n  " + speculation_rules_script() if drafts is not None else "",
+        modified=last_modified_date(md_path),
     )
-    out = md_path.parent / "index.html"
-    out.write_text(html_text, encoding="utf-8")
-    return slug
+    html_text, _ = prune_page(html_text)
+    return slug, write_if_changed(out, html_text), rewritten, inlined
+
+
+def referenced_files(md_path: Path, text: str) -> list[Path]:
+    files: set[Path] = set()
+    page = md_path.parent / "index.html"
+    for m in SOURCE_IMAGE_RE.finditer(text):
+        path = local_file(page, html.unescape(m.group(1) or m.group(2)))
+        if path is not None:
+            files.add(path)
+    for m in SOURCE_CHAT_FILE_RE.finditer(text):
+        if m.group(1).lower() == "transcript":
+            files.add(transcript_path({"transcript": m.group(2)}, md_path.parent))
+        else:
+            path = local_file(page, m.group(2))
+            if path is not None:
+                files.add(path)
+    return sorted(files)
 
 
-def main() -> None:
+def article_step_digest(
+    md_path: Path, drafts: set[str], backend: str, inline_limit: int, link_rules: list[Rule]
+) -> str:
+    # Besides the source, a finished article depends on the files it refers
+    # to (an edited transcript or image must not be skipped by --resume).
+    text = md_path.read_bytes()
+    digest = hashlib.sha256(text)
+    for path in referenced_files(md_path, text.decode("utf-8", errors="ignore")):
+        digest.update(file_stamp(path).encode("utf-8"))
+    digest.update(f"{block_cache_version()}-{backend}-{inline_limit}".encode("utf-8"))
+    digest.update("\n".join(sorted(drafts)).encode("utf-8"))
+    digest.update(render_rules(link_rules).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def record_step(journal: dict[str, str], step: str, digest: str = "done") -> None:
+    journal[step] = digest
+    # Without tree writes there is nothing on disk to resume from.
+    if writes_tree():
+        save_json_cache("journal", JOURNAL_VERSION, journal)
+
+
+def run_stage(stage: str, argv: list[str]) -> None:
+    # Stages run in this process, so they see the outputs held for --bundle.
+    # A stage that exits with an error prints its own reason (e.g. the budget
+    # overrun) and the build ends with one line instead of a traceback.
+    #
+    # Module state shared across stages: the git history (per HEAD, which a
+    # build does not move), the block, highlight and data-URI caches (keyed
+    # on what they read), prune_css's script names (assets/js is never
+    # written) and site_io's record of written paths. The `git status`
+    # snapshot goes stale as earlier steps write pages, so it is re-read.
+    forget_worktree_status()
+    try:
+        importlib.import_module(stage.removesuffix(".py")).main(argv)
+    except SystemExit as exc:
+        if exc.code in (None, 0):
+            return
+        if isinstance(exc.code, str):
+            print(exc.code, file=sys.stderr)
+        sys.exit(f"Build failed: stage {stage} failed")
+
+
+def is_site_output(path: Path) -> bool:
+    return path.is_relative_to(ROOT) and is_deployable(path.relative_to(ROOT))
+
+
+def build(args: argparse.Namespace) -> None:
+    # The journal records each finished article (by source digest) and stage,
+    # so --resume continues from the first incomplete step.
+    journal = load_json_cache("journal", JOURNAL_VERSION) if args.resume else {}
+    if writes_tree():
+        save_json_cache("journal", JOURNAL_VERSION, journal)
+    changed = 0
+
+    # Redirects come first: links in every page are rewritten against the
+    # rules of this build, parsed once, not the previous build's _redirects.
+    try:
+        link_rules = build_rules()
+    except ValueError as exc:
+        sys.exit(f"Build failed: redirects: {exc}")
+    write_redirects(link_rules)
+
     md_files = sorted(p for p in ARTICLES_DIR.glob("*/index.md") if p.parent.name != "data")
     if not md_files:
         print("No markdown article sources found.")
     else:
-        for md_path in md_files:
-            slug = build_one(md_path)
-            print(f"Built /articles/{slug}/")
+        resumed = 0
+        requests_saved = 0
+        drafts = draft_slugs(md_files)
+        load_block_cache()
+        try:
+            for md_path in md_files:
+                step = f"article:{md_path.parent.name}"
+                digest = article_step_digest(
+                    md_path, drafts, args.markdown_backend, args.inline_images_under, link_rules
+                )
+                if journal.get(step) == digest and (md_path.parent / "index.html").exists():
+                    resumed += 1
+                    print(f"Resumed /articles/{md_path.parent.name}/ (already built)")
+                    continue
+                try:
+                    slug, wrote, rewritten, inlined = build_one(
+                        md_path, drafts, args.markdown_backend, args.inline_images_under, link_rules
+                    )
+                except RenderGuardError as exc:
+                    sys.exit(f"Build failed: {exc}")
+                record_step(journal, step, digest)
+                if rewritten:
+                    print(f"Rewrote {rewritten} redirected link(s) in /articles/{slug}/")
+                if inlined:
+                    requests_saved += inlined
+                    print(f"Inlined images in /articles/{slug}/ ({inlined} request(s) saved)")
+                if wrote:
+                    changed += 1
+                    print(f"Built /articles/{slug}/")
+                else:
+                    print(f"Unchanged /articles/{slug}/")
+        finally:
+            save_block_cache()
+            save_highlight_cache()
+        print(
+            f"Built {changed} changed, {len(md_files) - changed - resumed} unchanged, "
+            f"{resumed} resumed article page(s)."
+        )
+        print(f"Block cache: {block_cache_stats['hits']} hit(s), {block_cache_stats['misses']} miss(es).")
+        if args.inline_images_under > 0:
+            print(f"Inlined images under {args.inline_images_under} bytes: {requests_saved} request(s) saved.")
+        if write_highlight_css():
+            print(f"Wrote {HIGHLIGHT_CSS.relative_to(ROOT)}")
+
+    for stage in STAGES:
+        step = f"stage:{stage}"
+        # A stage finished before the interruption is stale once any page changes.
+        if journal.get(step) and not changed:
+            print(f"Resumed {stage} (already ran)")
+            continue
+        argv = []
+        if stage == "page_budget.py" and args.fail_on_budget:
+            argv.append("--fail")
+        if stage == "enhance_legacy_articles_seo.py" and args.legacy_images:
+            argv.append("--images")
+        run_stage(stage, argv)
+        record_step(journal, step)
+
+    (CACHE_DIR / "journal.json").unlink(missing_ok=True)
 
-    subprocess.run([sys.executable, str(ROOT / "scripts" / "enhance_legacy_articles_seo.py")], check=True)
-    subprocess.run([sys.executable, str(ROOT / "scripts" / "generate_articles_index.py")], check=True)
-    subprocess.run([sys.executable, str(ROOT / "scripts" / "make_sitemap.py")], check=True)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fail-on-budget", action="store_true", help="fail when a page exceeds its performance budget")
+    parser.add_argument("--resume", action="store_true", help="skip articles and stages an interrupted build already finished")
+    parser.add_argument("--markdown-backend", choices=sorted(MARKDOWN_BACKENDS), default="builtin", help="markdown renderer for article sources")
+    parser.add_argument("--inline-images-under", type=int, default=0, metavar="BYTES", help="embed local article images of at most BYTES as data URIs (default: off)")
+    parser.add_argument("--legacy-images", action="store_true", help="add size, lazy-loading and decoding hints to legacy page images")
+    parser.add_argument("--bundle", type=Path, help="also stream the deployable site into this .tar/.tar.gz bundle")
+    parser.add_argument("--no-write", action="store_true", help="with --bundle, only write the bundle and leave the working tree untouched")
+    args = parser.parse_args()
+    if args.bundle and not args.bundle.name.endswith(BUNDLE_SUFFIXES):
+        parser.error(f"--bundle must end with one of {', '.join(BUNDLE_SUFFIXES)}")
+    if args.no_write and not args.bundle:
+        parser.error("--no-write needs --bundle")
+    if args.no_write and args.resume:
+        parser.error("--resume continues from pages on disk, so it cannot be combined with --no-write")
+    try:
+        markdown_backend(args.markdown_backend)
+    except ValueError as exc:
+        sys.exit(f"Build failed: {exc}")
+    check_highlighter()
+
+    if not args.bundle:
+        build(args)
+        return
+    # Every deployable output is held in memory as it is produced and goes
+    # into the bundle from there; only files the build does not produce
+    # (assets, images) are read from the tree.
+    out = args.bundle.resolve()
+    with capture_outputs(is_site_output, write_tree=not args.no_write):
+        build(args)
+        files = bundle_site(out)
+    print(f"Wrote {out} with {len(files)} file(s){' (working tree untouched)' if args.no_write else ''}.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Check that the markdown backends agree on the real articles, and time them.
+
+Every articles/*/index.md is rendered by the builtin renderer and each other
+installed backend; any difference in the HTML fails the check with a diff.
+The whole corpus is then rendered REPEATS times per backend (best of three),
+with the block cache off so every block is really rendered.
+
+Usage:
+  python scripts/compare_markdown_backends.py
+  python scripts/compare_markdown_backends.py --repeats 50
+"""
+from __future__ import annotations
+
+import argparse
+import difflib
+import sys
+import time
+from pathlib import Path
+
+from build_articles import (
+    ARTICLES_DIR,
+    MARKDOWN_BACKENDS,
+    markdown_backend,
+    parse_front_matter,
+    strip_leading_h1,
+)
+
+MAX_DIFF_LINES = 20
+
+
+def load_corpus() -> list[tuple[Path, str]]:
+    corpus = []
+    for md_path in sorted(ARTICLES_DIR.glob("*/index.md")):
+        _, body = parse_front_matter(md_path.read_text(encoding="utf-8"))
+        corpus.append((md_path, strip_leading_h1(body)))
+    return corpus
+
+
+def available_backends() -> list[str]:
+    names = []
+    for name in MARKDOWN_BACKENDS:
+        try:
+            markdown_backend(name)
+        except ValueError as exc:
+            print(f"skip {name}: {exc}")
+            continue
+        names.append(name)
+    return names
+
+
+def check_parity(corpus: list[tuple[Path, str]], names: list[str]) -> int:
+    failures = 0
+    reference = markdown_backend("builtin")
+    for md_path, text in corpus:
+        expected = reference(text, md_path.parent)
+        for name in names:
+            if name == "builtin":
+                continue
+            actual = markdown_backend(name)(text, md_path.parent)
+            label = f"articles/{md_path.parent.name}/index.md"
+            if actual == expected:
+                print(f"same {name:8} {label}")
+                continue
+            failures += 1
+            print(f"DIFF {name:8} {label}")
+            diff = difflib.unified_diff(
+                expected.splitlines(), actual.splitlines(), "builtin", name, lineterm="", n=1
+            )
+            for line in list(diff)[:MAX_DIFF_LINES]:
+                print(f"  {line}")
+    return failures
+
+
+def benchmark(corpus: list[tuple[Path, str]], names: list[str], repeats: int) -> None:
+    size = sum(len(text) for _, text in corpus)
+    for name in names:
+        render = markdown_backend(name)
+        best = float("inf")
+        for _ in range(3):
+            started = time.perf_counter()
+            for _ in range(repeats):
+                for md_path, text in corpus:
+                    render(text, md_path.parent)
+            best = min(best, time.perf_counter() - started)
+        per_doc = best / (repeats * len(corpus)) * 1000
+        print(f"{name:8} {best * 1000:8.1f} ms for {repeats} x {len(corpus)} article(s) ({size} chars each pass), {per_doc:.2f} ms/article")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=20, help="corpus passes per timing run")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    if not corpus:
+        sys.exit("No markdown article sources found.")
+    names = available_backends()
+    failures = check_parity(corpus, names)
+    benchmark(corpus, names, args.repeats)
+    if failures:
+        sys.exit(f"{failures} article(s) render differently across backends.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""Convert legacy article pages into markdown sources for build_articles.py.
+
+Each articles/<slug>/index.html exported from LinkedIn (no index.md next to
+it) is parsed once and written as articles/<slug>/index.md with front matter:
+title, date (from the "Published on" line), the SUMMARY_OVERRIDES summary and
+the original LinkedIn URL. Pages are converted in parallel. Every result is
+rendered back through render_markdown and compared with the legacy page; pages
+whose text or element counts differ are reported and, unless --allow-diffs is
+given, not written.
+
+Usage:
+  python scripts/convert_legacy_articles.py --dry-run
+  python scripts/convert_legacy_articles.py
+  python scripts/convert_legacy_articles.py --slug beyond-summarize --allow-diffs
+"""
+from __future__ import annotations
+
+import argparse
+import difflib
+import html
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+
+from build_articles import render_markdown
+from enhance_legacy_articles_seo import (
+    LINKEDIN_PULSE_RE,
+    PUBLISHED_RE,
+    SUMMARY_OVERRIDES,
+    TITLE_RE,
+    strip_site_suffix,
+    to_plain_text,
+    unescape_fully,
+)
+from site_io import write_if_changed
+
+ROOT = Path(__file__).resolve().parents[1]
+ARTICLES_DIR = ROOT / "articles"
+REPORT_DIR = ROOT / ".build-reports"
+# Elements whose counts must survive the round trip.
+FIDELITY_TAGS = ("img", "a", "li", "h2", "h3", "pre", "blockquote", "iframe")
+SKIP_TAGS = {"head", "nav", "style", "script", "title"}
+BLOCK_TAGS = {"p", "div", "section", "article", "figure", "figcaption", "ul", "ol", "table", "tr"}
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+WS_RE = re.compile(r"\s+")
+MAX_DIFF_LINES = 6
+
+
+class MarkdownWriter(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.blocks: list[str] = []
+        self.inline: list[str] = []
+        self.skip_depth = 0
+        self.in_body = False
+        self.lists: list[str] = []
+        self.in_blockquote = False
+        self.pre: list[str] | None = None
+        self.heading = 0
+        self.links: list[tuple[str, int]] = []
+        self.meta_para = False
+        self.iframes: list[str] = []
+        self.title_skipped = False
+        self.in_title = False
+        self.in_facade = False
+
+    def flush(self) -> None:
+        text = WS_RE.sub(" ", "".join(self.inline)).strip()
+        self.inline = []
+        if not text:
+            return
+        if self.heading:
+            self.blocks.append(f"{'#' * self.heading} {text}")
+        elif self.lists:
+            marker = "1." if self.lists[-1] == "ol" else "-"
+            self.blocks.append(f"{marker} {text}")
+        elif self.in_blockquote:
+            self.blocks.append(f"> {text}")
+        else:
+            self.blocks.append(text)
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        attr = {k: (v or "") for k, v in attrs}
+        if tag == "body":
+            self.in_body = True
+            return
+        if not self.in_body or self.skip_depth:
+            if tag in SKIP_TAGS:
+                self.skip_depth += 1
+            return
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag == "h1" and not self.title_skipped:
+            # The title lives in front matter; the h1 only linked to LinkedIn.
+            self.flush()
+            self.title_skipped = self.in_title = True
+            self.skip_depth += 1
+        elif self.pre is not None:
+            return
+        elif tag == "pre":
+            self.flush()
+            self.pre = []
+        elif tag in HEADING_TAGS:
+            self.flush()
+            self.heading = HEADING_TAGS[tag]
+        elif tag == "p" and {"created", "published"} & set(attr.get("class", "").split()):
+            self.flush()
+            self.meta_para = True
+        elif tag == "p" and self.lists:
+            # LinkedIn wraps list item text in <p>; keep it on the item.
+            return
+        elif tag in {"ul", "ol"}:
+            self.flush()
+            self.lists.append(tag)
+        elif tag == "li":
+            self.flush()
+        elif tag == "blockquote":
+            self.flush()
+            self.in_blockquote = True
+        elif tag in BLOCK_TAGS:
+            self.flush()
+        elif tag in {"strong", "b"}:
+            self.inline.append("**")
+        elif tag in {"em", "i"}:
+            self.inline.append("*")
+        elif tag == "code":
+            self.inline.append("`")
+        elif tag == "br":
+            self.inline.append(" ")
+        elif tag == "hr":
+            self.flush()
+            self.blocks.append("---")
+        elif tag == "a" and "video-facade" in attr.get("class", "").split() and attr.get("data-embed"):
+            # A click-to-load player (scripts/video_facades.py) goes back to a
+            # lone embed link, which the renderer turns into a facade again.
+            self.flush()
+            self.iframes.append(attr["data-embed"])
+            self.blocks.append(f"[{attr.get('data-title', '').strip() or 'Embedded video'}]({attr['data-embed']})")
+            self.in_facade = True
+            self.skip_depth += 1
+        elif tag == "a":
+            self.links.append((attr.get("href", ""), len(self.inline)))
+        elif tag == "img" and attr.get("src"):
+            self.inline.append(f"![{attr.get('alt', '').strip()}]({attr['src']})")
+        elif tag == "iframe" and attr.get("src"):
+            self.flush()
+            self.iframes.append(attr["src"])
+            self.blocks.append(f"[Embedded video]({attr['src']})")
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag in SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIP_TAGS or (tag == "h1" and self.in_title) or (tag == "a" and self.in_facade):
+            self.in_title = self.in_facade = False
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if not self.in_body or self.skip_depth:
+            return
+        if tag == "pre" and self.pre is not None:
+            code = "".join(self.pre).strip("\n")
+            self.blocks.append(f"```\n{code}\n```")
+            self.pre = None
+        elif self.pre is not None:
+            return
+        elif tag in HEADING_TAGS:
+            self.flush()
+            self.heading = 0
+        elif tag == "p" and self.meta_para:
+            self.meta_para = False
+        elif tag == "p" and self.lists:
+            return
+        elif tag in {"ul", "ol"}:
+            self.flush()
+            if self.lists:
+                self.lists.pop()
+        elif tag == "li":
+            self.flush()
+        elif tag == "blockquote":
+            self.flush()
+            self.in_blockquote = False
+        elif tag in BLOCK_TAGS:
+            self.flush()
+        elif tag in {"strong", "b"}:
+            self.inline.append("**")
+        elif tag in {"em", "i"}:
+            self.inline.append("*")
+        elif tag == "code":
+            self.inline.append("`")
+        elif tag == "a" and self.links:
+            href, start = self.links.pop()
+            text = WS_RE.sub(" ", "".join(self.inline[start:])).strip()
+            del self.inline[start:]
+            if href and text:
+                self.inline.append(f"[{text}]({href})")
+            else:
+                self.inline.append(text)
+
+    def handle_data(self, data: str) -> None:
+        if not self.in_body or self.skip_depth or self.meta_para:
+            return
+        if self.pre is not None:
+            self.pre.append(data)
+        else:
+            self.inline.append(data.replace("\xa0", " "))
+
+    def markdown(self) -> str:
+        self.flush()
+        out: list[str] = []
+        previous = ""
+        for block in self.blocks:
+            # Consecutive list items and quote lines stay in one block.
+            tight = block[:2] in {"- ", "1.", "> "} and previous[:2] == block[:2]
+            out.append(("\n" if tight else "\n\n") + block if out else block)
+            previous = block
+        return "".join(out) + "\n"
+
+
+def is_legacy_page(page: str) -> bool:
+    return "<!doctype html>" not in page.lower() and PUBLISHED_RE.search(page) is not None
+
+
+def front_matter(page: str, slug: str) -> dict[str, str]:
+    meta: dict[str, str] = {}
+    title = TITLE_RE.search(page)
+    if title:
+        meta["title"] = strip_site_suffix(unescape_fully(WS_RE.sub(" ", title.group(1)).strip()))
+    published = PUBLISHED_RE.search(page)
+    if published:
+        meta["date"] = published.group(1)
+    if slug in SUMMARY_OVERRIDES:
+        meta["summary"] = SUMMARY_OVERRIDES[slug]
+    meta["status"] = "published"
+    original = LINKEDIN_PULSE_RE.search(page)
+    if original:
+        meta["original"] = f"https://www.linkedin.com/pulse/{original.group(1)}"
+    return meta
+
+
+def body_markdown(page: str) -> str:
+    writer = MarkdownWriter()
+    writer.feed(page)
+    return writer.markdown()
+
+
+def legacy_content(page: str) -> str:
+    body = page[page.lower().find("<body") :]
+    body = re.sub(r"<nav\b.*?</nav>", " ", body, flags=re.IGNORECASE | re.DOTALL)
+    body = re.sub(r"<h1\b.*?</h1>", " ", body, count=1, flags=re.IGNORECASE | re.DOTALL)
+    return re.sub(
+        r'<p class="(?:created|published)">.*?</p>', " ", body, flags=re.IGNORECASE | re.DOTALL
+    )
+
+
+def tag_counts(fragment: str) -> dict[str, int]:
+    return {tag: len(re.findall(rf"<{tag}\b", fragment, flags=re.IGNORECASE)) for tag in FIDELITY_TAGS}
+
+
+def words(fragment: str) -> list[str]:
+    text = html.unescape(to_plain_text(fragment)).replace("\xa0", " ")
+    return text.split()
+
+
+def fidelity_diffs(original: str, rendered: str) -> list[str]:
+    diffs: list[str] = []
+    before, after = tag_counts(original), tag_counts(rendered)
+    for tag in FIDELITY_TAGS:
+        if before[tag] != after[tag]:
+            diffs.append(f"<{tag}> count {before[tag]} -> {after[tag]}")
+    a, b = words(original), words(rendered)
+    for op, i1, i2, j1, j2 in difflib.SequenceMatcher(a=a, b=b, autojunk=False).get_opcodes():
+        if op == "equal":
+            continue
+        if len(diffs) >= MAX_DIFF_LINES:
+            diffs.append("...")
+            break
+        diffs.append(f"text {op}: {' '.join(a[i1:i2])[:80]!r} -> {' '.join(b[j1:j2])[:80]!r}")
+    return diffs
+
+
+def render_source(meta: dict[str, str], markdown: str) -> str:
+    lines = ["---"] + [f"{key}: {value}" for key, value in meta.items()] + ["---", ""]
+    return "\n".join(lines) + markdown
+
+
+def convert_page(html_path: Path) -> dict:
+    slug = html_path.parent.name
+    page = html_path.read_text(encoding="utf-8")
+    meta = front_matter(page, slug)
+    markdown = body_markdown(page)
+    rendered = render_markdown(markdown, base_dir=html_path.parent)
+    return {
+        "slug": slug,
+        "source": render_source(meta, markdown),
+        "diffs": fidelity_diffs(legacy_content(page), rendered),
+    }
+
+
+def legacy_pages(slugs: list[str]) -> list[Path]:
+    pages = []
+    for html_path in sorted(ARTICLES_DIR.glob("*/index.html")):
+        if slugs and html_path.parent.name not in slugs:
+            continue
+        if (html_path.parent / "index.md").exists():
+            continue
+        if is_legacy_page(html_path.read_text(encoding="utf-8")):
+            pages.append(html_path)
+    return pages
+
+
+def render_report(results: list[dict]) -> str:
+    lines = ["# Legacy conversion report", ""]
+    for r in results:
+        status = "clean" if not r["diffs"] else f"{len(r['diffs'])} difference(s)"
+        lines.append(f"## {r['slug']}: {status}")
+        lines.extend(f"- {d}" for d in r["diffs"])
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slug", action="append", default=[], help="only convert this slug (repeatable)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="parallel worker processes")
+    parser.add_argument("--dry-run", action="store_true", help="report fidelity without writing index.md files")
+    parser.add_argument("--allow-diffs", action="store_true", help="also write pages whose round trip differs")
+    args = parser.parse_args()
+
+    pages = legacy_pages(args.slug)
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        results = list(pool.map(convert_page, pages))
+
+    written = 0
+    for r in results:
+        if r["diffs"]:
+            print(f"Differs {r['slug']}: {r['diffs'][0]}" + (f" (+{len(r['diffs']) - 1} more)" if len(r["diffs"]) > 1 else ""))
+        if args.dry_run or (r["diffs"] and not args.allow_diffs):
+            continue
+        if write_if_changed(ARTICLES_DIR / r["slug"] / "index.md", r["source"]):
+            written += 1
+            print(f"Wrote articles/{r['slug']}/index.md")
+
+    REPORT_DIR.mkdir(exist_ok=True)
+    write_if_changed(REPORT_DIR / "legacy-conversion.md", render_report(results))
+    write_if_changed(
+        REPORT_DIR / "legacy-conversion.json",
+        json.dumps([{"slug": r["slug"], "diffs": r["diffs"]} for r in results], indent=2) + "\n",
+    )
+    clean = sum(1 for r in results if not r["diffs"])
+    print(f"Converted {len(results)} legacy page(s): {clean} clean, {len(results) - clean} with differences; wrote {written}.")
+
+
+if __name__ == "__main__":
+    main()
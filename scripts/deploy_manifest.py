@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Diff a manifest of deployable files against the last deploy.
+
+The manifest maps every deployable path to its size and SHA-256. Comparing it
+with the manifest recorded at the last deploy gives the minimal set of files
+to upload and delete. A local directory can stand in for the remote target.
+A plain run only previews the diff; the baseline is recorded with --record
+(after a deploy) or in the target directory when --target syncs it.
+
+Usage:
+  python scripts/deploy_manifest.py
+  python scripts/deploy_manifest.py --record
+  python scripts/deploy_manifest.py --previous path/to/last-manifest.json
+  python scripts/deploy_manifest.py --target /tmp/site-preview
+  python scripts/deploy_manifest.py --previous last-deploy.tar.gz
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import shutil
+import sys
+import tarfile
+from pathlib import Path
+from typing import Iterator
+
+from make_sitemap import is_excluded
+from site_io import write_if_changed
+
+ROOT = Path(__file__).resolve().parents[1]
+MANIFEST_NAME = ".deploy-manifest.json"
+# Same exclusions as the sitemap, except that assets are deployed. Font
+# sources are only read by scripts/subset_fonts.py.
+DEPLOY_EXCLUDE_DIRS = {"scripts", ".git", "__pycache__", "font-sources"}
+DEPLOY_SKIP_SUFFIXES = {".md", ".py", ".pyc", ".jsonl", ".tar", ".gz", ".tgz"}
+HASH_CHUNK = 1024 * 1024
+BUNDLE_SUFFIXES = (".tar", ".tar.gz", ".tgz")
+
+
+def is_deployable(rel: Path) -> bool:
+    if is_excluded(rel, DEPLOY_EXCLUDE_DIRS):
+        return False
+    return rel.suffix.lower() not in DEPLOY_SKIP_SUFFIXES
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        while chunk := fh.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def deployable_files(root: Path) -> Iterator[tuple[str, Path]]:
+    for path in sorted(root.rglob("*")):
+        if not path.is_file():
+            continue
+        rel = path.relative_to(root)
+        if is_deployable(rel):
+            yield rel.as_posix(), path
+
+
+def build_manifest(root: Path) -> dict[str, dict[str, int | str]]:
+    return {
+        rel: {"size": path.stat().st_size, "sha256": file_sha256(path)}
+        for rel, path in deployable_files(root)
+    }
+
+
+def is_bundle(path: Path) -> bool:
+    return path.name.endswith(BUNDLE_SUFFIXES)
+
+
+def load_manifest(path: Path) -> dict[str, dict[str, int | str]]:
+    # A bundle from make_bundle.py carries its manifest, so it can be diffed
+    # without unpacking.
+    if not path.exists():
+        return {}
+    if is_bundle(path):
+        with tarfile.open(path, "r:*") as tar:
+            try:
+                member = tar.extractfile(MANIFEST_NAME)
+            except KeyError:
+                return {}
+            return json.loads(member.read().decode("utf-8")).get("files", {}) if member else {}
+    return json.loads(path.read_text(encoding="utf-8")).get("files", {})
+
+
+def dump_manifest(files: dict[str, dict[str, int | str]]) -> str:
+    return json.dumps({"files": files}, indent=2, sort_keys=True) + "\n"
+
+
+def diff_manifests(
+    previous: dict[str, dict[str, int | str]],
+    current: dict[str, dict[str, int | str]],
+) -> dict[str, list[str]]:
+    added = sorted(p for p in current if p not in previous)
+    deleted = sorted(p for p in previous if p not in current)
+    changed = sorted(
+        p
+        for p in current
+        if p in previous and current[p]["sha256"] != previous[p].get("sha256")
+    )
+    return {"added": added, "changed": changed, "deleted": deleted}
+
+
+def sync_to_directory(root: Path, target: Path, diff: dict[str, list[str]]) -> None:
+    for rel in diff["added"] + diff["changed"]:
+        dest = target / rel
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(root / rel, dest)
+    for rel in diff["deleted"]:
+        (target / rel).unlink(missing_ok=True)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, default=ROOT / MANIFEST_NAME, help="the recorded manifest of the last deploy")
+    parser.add_argument("--record", action="store_true", help="record the current manifest in --out as the deployed baseline")
+    parser.add_argument("--previous", type=Path, help="manifest or bundle of the last deploy (defaults to the target's manifest, else --out)")
+    parser.add_argument("--target", type=Path, help="local directory standing in for the deploy target; the diff is applied to it")
+    parser.add_argument("--json", action="store_true", help="print the diff as JSON")
+    args = parser.parse_args(argv)
+
+    # The previous manifest is read before anything is written: by default it
+    # is the one --out recorded last time, i.e. the last deploy. Previewing
+    # leaves it alone, so it keeps describing what was actually deployed.
+    previous_path = args.previous
+    if previous_path is None:
+        previous_path = args.target / MANIFEST_NAME if args.target is not None else args.out
+    previous = load_manifest(previous_path)
+    current = build_manifest(ROOT)
+    diff = diff_manifests(previous, current)
+    if args.record:
+        write_if_changed(args.out, dump_manifest(current))
+
+    if args.target is not None:
+        args.target.mkdir(parents=True, exist_ok=True)
+        sync_to_directory(ROOT, args.target, diff)
+        write_if_changed(args.target / MANIFEST_NAME, dump_manifest(current))
+
+    if args.json:
+        json.dump(diff, sys.stdout, indent=2)
+        print()
+        return
+    for kind in ("added", "changed", "deleted"):
+        for rel in diff[kind]:
+            print(f"{kind:8} {rel}")
+    upload_bytes = sum(int(current[p]["size"]) for p in diff["added"] + diff["changed"])
+    print(
+        f"{len(current)} deployable file(s): {len(diff['added'])} added, "
+        f"{len(diff['changed'])} changed, {len(diff['deleted'])} deleted "
+        f"({upload_bytes} bytes to upload)."
+    )
+
+
+if __name__ == "__main__":
+    main()
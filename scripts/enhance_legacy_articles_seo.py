@@ -1,12 +1,35 @@
 #!/usr/bin/env python3
-"""Add SEO metadata to legacy article HTML pages that lack modern tags."""
+"""Add SEO metadata to legacy article HTML pages that lack modern tags.
+
+Each page also loads /assets/js/main.js, as the generated pages do, so
+visitors landing on a legacy article install the service worker, and gets
+the shared speculation rules, with links to drafts marked to be skipped.
+
+With --images, <img> tags in the page body also get their intrinsic
+width/height (read from the image file), loading="lazy" on all but the
+first image, and decoding="async". Only missing attributes are added, so
+re-running is a no-op.
+
+Usage:
+  python scripts/enhance_legacy_articles_seo.py
+  python scripts/enhance_legacy_articles_seo.py --images
+"""
 from __future__ import annotations
 
+import argparse
 import html
 import json
 import re
+import struct
 from pathlib import Path
 
+from build_articles import draft_slugs
+from generate_articles_index import mark_draft_links, speculation_rules_script
+from make_redirects import load_rules, rewrite_links
+from page_budget import local_file
+from site_io import glob_outputs, read_output_text, write_if_changed
+from video_facades import add_facade_head, replace_video_iframes
+
 ROOT = Path(__file__).resolve().parents[1]
 ARTICLES_DIR = ROOT / "articles"
 SITE_NAME = "Scott Labbe"
@@ -66,8 +89,16 @@ CANONICAL_RE = re.compile(
 )
 PUBLISHED_RE = re.compile(r"Published on\s+(\d{4}-\d{2}-\d{2})", re.IGNORECASE)
 HEAD_CLOSE_RE = re.compile(r"</head>", re.IGNORECASE)
+LINKEDIN_PULSE_RE = re.compile(r'href="https://www\.linkedin\.com/pulse/([^"/?#]+)', re.IGNORECASE)
+# Markdown sources converted from legacy pages keep the post in front matter.
+ORIGINAL_PULSE_RE = re.compile(r"^original:\s*https://www\.linkedin\.com/pulse/([^\s/?#]+)", re.IGNORECASE | re.MULTILINE)
 TAG_RE = re.compile(r"<[^>]+>")
+IMG_TAG_RE = re.compile(r"<img\b([^>]*?)\s*(/?)>", re.IGNORECASE)
+IMG_ATTR_RE = re.compile(r"""([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?""")
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
 WS_RE = re.compile(r"\s+")
+MAIN_SCRIPT = '<script src="/assets/js/main.js" defer></script>'
+SPECULATION_RULES_RE = re.compile(r'\s*<script type="speculationrules">.*?</script>', re.DOTALL)
 
 
 def to_plain_text(source: str) -> str:
@@ -267,18 +298,155 @@ def insert_metadata(page: str) -> str | None:
     return cleaned[: head_close.start()] + metadata + "\n" + cleaned[head_close.start() :]
 
 
-def main() -> None:
+def image_size(path: Path) -> tuple[int, int] | None:
+    # Width and height from the PNG, GIF, JPEG or WebP header.
+    try:
+        with path.open("rb") as fh:
+            head = fh.read(32)
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", head[6:10])
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                chunk = head[12:16]
+                if chunk == b"VP8 ":
+                    w, h = struct.unpack("<HH", head[26:30])
+                    return w & 0x3FFF, h & 0x3FFF
+                if chunk == b"VP8L":
+                    bits = int.from_bytes(head[21:25], "little")
+                    return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+                if chunk == b"VP8X":
+                    return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+                return None
+            if head[:2] != b"\xff\xd8":
+                return None
+            fh.seek(2)
+            while True:
+                marker = fh.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return None
+                if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+                    continue
+                length = struct.unpack(">H", fh.read(2))[0]
+                if marker[1] in JPEG_SOF_MARKERS:
+                    h, w = struct.unpack(">xHH", fh.read(5))
+                    return w, h
+                fh.seek(length - 2, 1)
+    except (OSError, struct.error):
+        return None
+
+
+def enhance_images(page: str, html_path: Path) -> tuple[str, int]:
+    """Add missing size, loading and decoding hints to body <img> tags."""
+    body_start = page.lower().find("<body")
+    if body_start < 0:
+        return page, 0
+    changed = 0
+    seen = 0
+
+    def sub(m: re.Match[str]) -> str:
+        nonlocal changed, seen
+        attrs = {k.lower(): next((v for v in vals if v), "") for k, *vals in IMG_ATTR_RE.findall(m.group(1))}
+        first = seen == 0
+        seen += 1
+        extra: list[str] = []
+        if "width" not in attrs and "height" not in attrs:
+            path = local_file(html_path, html.unescape(attrs.get("src", "")))
+            size = image_size(path) if path is not None and path.is_file() else None
+            if size:
+                extra.append(f'width="{size[0]}" height="{size[1]}"')
+        if not first and "loading" not in attrs:
+            extra.append('loading="lazy"')
+        if "decoding" not in attrs:
+            extra.append('decoding="async"')
+        if not extra:
+            return m.group(0)
+        changed += 1
+        closing = " />" if m.group(2) else ">"
+        return f"<img{m.group(1)} {' '.join(extra)}{closing}"
+
+    body = IMG_TAG_RE.sub(sub, page[body_start:])
+    return page[:body_start] + body, changed
+
+
+def legacy_source_redirects() -> dict[str, str]:
+    # Legacy pages link their h1 to the original LinkedIn post (converted
+    # markdown sources keep it as "original:"), whose slug is also the file
+    # name of the exported source in articles/data/Articles/.
+    # build_articles.py calls this before rendering, so a markdown source
+    # counts even if its index.html has not been built yet.
+    sources_dir = ARTICLES_DIR / "data" / "Articles"
+    redirects: dict[str, str] = {}
+    page_dirs = {p.parent for pattern in ("*/index.html", "*/index.md") for p in ARTICLES_DIR.glob(pattern)}
+    for page_dir in sorted(page_dirs):
+        md_path = page_dir / "index.md"
+        if md_path.exists():
+            match = ORIGINAL_PULSE_RE.search(md_path.read_text(encoding="utf-8"))
+        else:
+            match = LINKEDIN_PULSE_RE.search(read_output_text(page_dir / "index.html"))
+        if not match:
+            continue
+        source = sources_dir / f"{match.group(1)}.html"
+        if source.exists():
+            redirects[f"/articles/data/Articles/{source.name}"] = f"/articles/{page_dir.name}/"
+    return redirects
+
+
+def add_main_script(page: str) -> str:
+    head_close = HEAD_CLOSE_RE.search(page)
+    if MAIN_SCRIPT in page or not head_close:
+        return page
+    return page[: head_close.start()] + "  " + MAIN_SCRIPT + "\n" + page[head_close.start() :]
+
+
+def add_speculation_rules(page: str) -> str:
+    # Replaced on every run, so a change to the shared rule reaches these
+    # pages as it does the generated ones.
+    page = SPECULATION_RULES_RE.sub("", page)
+    head_close = HEAD_CLOSE_RE.search(page)
+    if not head_close:
+        return page
+    return page[: head_close.start()] + "  " + speculation_rules_script() + "\n" + page[head_close.start() :]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", action="store_true", help="also add size, loading and decoding hints to body images")
+    args = parser.parse_args(argv)
+
     updated = 0
-    for html_path in sorted(ARTICLES_DIR.glob("*/index.html")):
-        content = html_path.read_text(encoding="utf-8")
+    unchanged = 0
+    link_rules = load_rules()
+    drafts = draft_slugs(sorted(p for p in ARTICLES_DIR.glob("*/index.md") if p.parent.name != "data"))
+    for html_path in glob_outputs(ARTICLES_DIR, "*/index.html"):
+        content = read_output_text(html_path)
         new_content = insert_metadata(content)
         if new_content is None:
             continue
-        html_path.write_text(new_content, encoding="utf-8")
+        new_content, rewritten = rewrite_links(new_content, link_rules)
+        if rewritten:
+            print(f"Rewrote {rewritten} redirected link(s) in {html_path.relative_to(ROOT)}")
+        title = strip_site_suffix(unescape_fully(TITLE_RE.search(new_content).group(1)))
+        new_content, facades = replace_video_iframes(new_content, title)
+        # Before the facade head, which is re-inserted at the end of <head>
+        # on every run.
+        new_content = add_main_script(new_content)
+        new_content = mark_draft_links(new_content, f"/articles/{html_path.parent.name}/", drafts)
+        new_content = add_speculation_rules(new_content)
+        new_content = add_facade_head(new_content)
+        if facades:
+            print(f"Replaced {facades} video embed(s) with click-to-load facades in {html_path.relative_to(ROOT)}")
+        if args.images:
+            new_content, images = enhance_images(new_content, html_path)
+            if images:
+                print(f"Added image hints to {images} <img> tag(s) in {html_path.relative_to(ROOT)}")
+        if not write_if_changed(html_path, new_content):
+            unchanged += 1
+            continue
         updated += 1
         print(f"Updated {html_path.relative_to(ROOT)}")
 
-    print(f"Updated {updated} legacy article page(s).")
+    print(f"Updated {updated} legacy article page(s), {unchanged} unchanged.")
 
 
 if __name__ == "__main__":
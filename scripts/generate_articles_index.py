@@ -6,10 +6,17 @@ Usage:
 """
 from __future__ import annotations
 
+import argparse
 import datetime as dt
+import html
 import json
 import re
 from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from git_dates import first_commit_date
+from site_io import glob_outputs, read_output_bytes, writes_tree, write_if_changed
+from subset_fonts import font_head
 
 ROOT = Path(__file__).resolve().parents[1]
 ARTICLES_DIR = ROOT / "articles"
@@ -22,6 +29,22 @@ CREATED_RE = re.compile(r'class="created">\s*Created on\s*([^<]+)<', flags=re.IG
 META_PUBLISHED_RE = re.compile(r'name="article:published"\s+content="([^"]+)"', flags=re.IGNORECASE)
 META_STATUS_RE = re.compile(r'name="article:status"\s+content="([^"]+)"', flags=re.IGNORECASE)
 TAG_RE = re.compile(r"<[^>]+>")
+# Everything extract_meta needs sits in the head or just after <body>, so read
+# a bounded prefix in chunks and only fall back to the whole file if the
+# published line never shows up inside it.
+HEAD_SCAN_CHUNK = 16 * 1024
+HEAD_SCAN_LIMIT = 256 * 1024
+# Speculation rules: links to published articles are fetched when the reader
+# hovers them ("moderate"; "conservative" waits for pointer-down), and the
+# index also fetches its newest few entries eagerly. Set the count to 0 to
+# turn eager fetching off, or the action to "prerender" for instant loads.
+SPECULATION_ACTION = "prefetch"
+SPECULATION_EAGERNESS = "moderate"
+SPECULATION_EAGER_COUNT = 3
+# Links to draft articles carry this attribute so the document rule skips them.
+SPECULATION_SKIP_ATTR = "data-no-speculate"
+ANCHOR_HREF_RE = re.compile(r'(<a href=")([^"]*)(")')
+SKIP_MARK_RE = re.compile(rf'(<a href="[^"]*") {SPECULATION_SKIP_ATTR}\b')
 
 def parse_dt(s: str) -> dt.datetime:
     if not s:
@@ -62,19 +85,82 @@ def extract_meta(html: str) -> tuple[str, str, str, str]:
     status = meta_status.group(1).strip().lower() if meta_status else "published"
     return title, created, published, status
 
-def main() -> None:
+def head_complete(html: str) -> bool:
+    # The published paragraph follows the h1, the created line and every
+    # article:* meta tag, so once both are present nothing later can matter.
+    return H1_RE.search(html) is not None and PUBLISHED_RE.search(html) is not None
+
+def scan_meta(path: Path) -> tuple[str, str, str, str]:
+    if not writes_tree():
+        return extract_meta(read_output_bytes(path).decode("utf-8", errors="ignore"))
+    buf = bytearray()
+    with path.open("rb") as fh:
+        while len(buf) < HEAD_SCAN_LIMIT:
+            chunk = fh.read(HEAD_SCAN_CHUNK)
+            if not chunk:
+                return extract_meta(buf.decode("utf-8", errors="ignore"))
+            buf += chunk
+            text = buf.decode("utf-8", errors="ignore")
+            if head_complete(text):
+                return extract_meta(text)
+        buf += fh.read()
+    return extract_meta(buf.decode("utf-8", errors="ignore"))
+
+def article_url(slug: str) -> str:
+    return f"/articles/{slug}/"
+
+def speculation_rules_script(eager_urls: list[str] | None = None) -> str:
+    # A document rule matches the links on the page itself, so every article
+    # carries the same bytes; a list of published slugs would change every
+    # page whenever one article is published or unpublished.
+    rules = [
+        {
+            "source": "document",
+            "where": {
+                "and": [
+                    {"href_matches": ["/articles/", "/articles/:slug/"]},
+                    {"not": {"selector_matches": f"[{SPECULATION_SKIP_ATTR}]"}},
+                ]
+            },
+            "eagerness": SPECULATION_EAGERNESS,
+        }
+    ]
+    if eager_urls:
+        rules.append({"source": "list", "urls": eager_urls, "eagerness": "eager"})
+    return f'<script type="speculationrules">{json.dumps({SPECULATION_ACTION: rules})}</script>'
+
+def mark_draft_links(page_html: str, page_url: str, draft_slugs: set[str]) -> str:
+    """Tag links to draft articles with SPECULATION_SKIP_ATTR.
+
+    Marks from an earlier run are dropped first, so a page that is enhanced
+    in place (the legacy pages) loses them once the article is published.
+    """
+    page_html = SKIP_MARK_RE.sub(r"\1", page_html)
+    if not draft_slugs:
+        return page_html
+    drafts = {article_url(slug) for slug in draft_slugs}
+    site = urlsplit(SITE)
+
+    def sub(m: re.Match[str]) -> str:
+        target = urlsplit(urljoin(SITE + page_url, html.unescape(m.group(2))))
+        if target.netloc != site.netloc or target.path.rstrip("/") + "/" not in drafts:
+            return m.group(0)
+        return f"{m.group(1)}{m.group(2)}{m.group(3)} {SPECULATION_SKIP_ATTR}"
+
+    return ANCHOR_HREF_RE.sub(sub, page_html)
+
+def collect_articles() -> list[dict]:
     items = []
-    for p in sorted(ARTICLES_DIR.glob("*/index.html")):
+    for p in glob_outputs(ARTICLES_DIR, "*/index.html"):
         slug = p.parent.name
         if slug in {"data"} or slug.startswith("."):
             continue
-        html = p.read_text(encoding="utf-8", errors="ignore")
-        title, created, published, status = extract_meta(html)
+        title, created, published, status = scan_meta(p)
         if status == "draft":
             continue
         published_dt = parse_dt(published)
         if published_dt == dt.datetime.min:
-            published_dt = dt.datetime.fromtimestamp(p.stat().st_mtime)
+            published_dt = dt.datetime.combine(first_commit_date(p), dt.time())
         items.append({
             "file": str(p),
             "slug": slug,
@@ -85,6 +171,11 @@ def main() -> None:
         })
 
     items.sort(key=lambda x: x["published_dt"], reverse=True)
+    return items
+
+def main(argv: list[str] | None = None) -> None:
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args(argv)
+    items = collect_articles()
 
     rows = []
     for it in items:
@@ -95,6 +186,8 @@ def main() -> None:
     rows_html = "\n".join(rows)
     canonical = f"{SITE}/articles/"
     description = summarize_title("Articles")
+    urls = [article_url(it["slug"]) for it in items]
+    speculation = speculation_rules_script(urls[:SPECULATION_EAGER_COUNT])
     json_ld = json.dumps(
         {
             "@context": "https://schema.org",
@@ -121,11 +214,11 @@ def main() -> None:
   <meta name=\"twitter:card\" content=\"summary\" />
   <meta name=\"twitter:title\" content=\"Articles — Scott Labbe\" />
   <meta name=\"twitter:description\" content=\"{description}\" />
-  <link rel=\"preconnect\" href=\"https://fonts.googleapis.com\">
-  <link rel=\"preconnect\" href=\"https://fonts.gstatic.com\" crossorigin>
-  <link href=\"https://fonts.googleapis.com/css2?family=Libre+Baskerville:ital,wght@0,400;0,700;1,400&family=Space+Mono:ital,wght@0,400;0,700;1,400&display=swap\" rel=\"stylesheet\">
+  {font_head()}
   <link rel=\"stylesheet\" href=\"/assets/css/main.css\" />
+  <script src=\"/assets/js/main.js\" defer></script>
   <script type=\"application/ld+json\">{json_ld}</script>
+  {speculation}
 </head>
 <body>
   <div class=\"container\">
@@ -155,8 +248,10 @@ def main() -> None:
 </html>
 """
 
-    OUT.write_text(page, encoding="utf-8")
-    print(f"Wrote {OUT} with {len(items)} article(s).")
+    if write_if_changed(OUT, page):
+        print(f"Wrote {OUT} with {len(items)} article(s).")
+    else:
+        print(f"Unchanged {OUT} with {len(items)} article(s).")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""First- and last-commit dates for every tracked file, from one git log.
+
+File mtimes are meaningless on a fresh checkout (every file is "now"), so
+published/modified dates and sitemap <lastmod> come from history instead.
+The whole log is read in a single `git log` call and cached per HEAD commit
+in .build-cache/. Renames are followed (`-M`), so a moved file keeps the
+first date of its old path. Files with uncommitted changes are dated by
+their mtime, which is also the fallback outside a git checkout.
+
+A shallow clone only has the newest commits, so its "first" dates would be
+wrong. There the first dates recorded by the last full-history build are
+used instead (with a warning), and pages without one fall back to their
+front-matter date, then mtime. `git fetch --unshallow` restores exact dates.
+
+Usage:
+  python scripts/git_dates.py articles/beyond-summarize/index.html
+"""
+from __future__ import annotations
+
+import datetime as dt
+import subprocess
+import sys
+from pathlib import Path
+
+from site_io import load_json_cache, output_pending, save_json_cache, was_written
+
+ROOT = Path(__file__).resolve().parents[1]
+COMMIT_MARK = "\x1e"
+RECORDED_CACHE_VERSION = "1"
+
+_history: dict[str, list[str]] | None = None
+_dirty: set[str] | None = None
+
+
+def git(*args: str, cwd: Path = ROOT) -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", *args], cwd=cwd, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout
+
+
+def parse_log(log: str) -> dict[str, list[str]]:
+    # Newest commit first: the first date seen for a path is its last commit,
+    # the final one its first commit. Past a rename, the old path's commits
+    # belong to the file's current path.
+    history: dict[str, list[str]] = {}
+    renamed: dict[str, str] = {}
+    for record in log.split(COMMIT_MARK)[1:]:
+        date, *entries = record.strip("\n").split("\n")
+        for entry in entries:
+            if not entry:
+                continue
+            status, *paths = entry.split("\t")
+            path = renamed.get(paths[-1], paths[-1])
+            if path in history:
+                history[path][0] = date
+            else:
+                history[path] = [date, date]
+            if status.startswith("R"):
+                renamed[paths[0]] = path
+    return history
+
+
+def read_history(root: Path = ROOT) -> dict[str, list[str]]:
+    log = git(
+        "-c", "core.quotePath=false", "log", f"--format={COMMIT_MARK}%cs", "--name-status", "-M",
+        cwd=root,
+    )
+    return parse_log(log) if log else {}
+
+
+def is_shallow(root: Path = ROOT) -> bool:
+    return (git("rev-parse", "--is-shallow-repository", cwd=root) or "").strip() == "true"
+
+
+def merge_recorded(shallow: dict[str, list[str]], recorded: dict[str, list[str]]) -> dict[str, list[str]]:
+    # A shallow log's oldest commit is not the file's first one: keep the
+    # recorded first date, or none (front matter, then mtime, decide).
+    merged = {}
+    for path, (_, last) in shallow.items():
+        first, recorded_last = recorded.get(path, ["", ""])
+        merged[path] = [first, max(last, recorded_last)]
+    for path, dates in recorded.items():
+        merged.setdefault(path, dates)
+    return merged
+
+
+def history() -> dict[str, list[str]]:
+    """Map each path to [first commit date, last commit date] (ISO dates).
+
+    The first date is "" when a shallow clone cannot tell it.
+    """
+    global _history
+    if _history is None:
+        head = (git("rev-parse", "HEAD") or "").strip()
+        if not head:
+            _history = {}
+            return _history
+        shallow = is_shallow()
+        if shallow:
+            print(
+                "Warning: shallow git checkout; first-commit dates come from front matter or the "
+                "last full-history build (run `git fetch --unshallow` for exact dates).",
+                file=sys.stderr,
+            )
+        version = f"{head}:shallow" if shallow else head
+        _history = load_json_cache("git-dates", version)
+        if not _history:
+            _history = read_history()
+            if shallow:
+                _history = merge_recorded(_history, load_json_cache("git-dates-recorded", RECORDED_CACHE_VERSION))
+            else:
+                save_json_cache("git-dates-recorded", RECORDED_CACHE_VERSION, _history)
+            save_json_cache("git-dates", version, _history)
+    return _history
+
+
+def dirty_paths() -> set[str]:
+    global _dirty
+    if _dirty is None:
+        entries = iter((git("status", "--porcelain", "-z", "--untracked-files=all") or "").split("\0"))
+        _dirty = set()
+        for entry in entries:
+            if len(entry) > 3:
+                _dirty.add(entry[3:])
+                if entry[0] in "RC":
+                    next(entries, None)  # the rename/copy source path
+    return _dirty
+
+
+def forget_worktree_status() -> None:
+    """Re-read `git status` on next use; the history (per HEAD) is kept."""
+    global _dirty
+    _dirty = None
+
+
+def rel_path(path: Path) -> str:
+    return path.resolve().relative_to(ROOT).as_posix()
+
+
+def mtime_date(path: Path) -> dt.date:
+    # A page the build holds in memory only (--bundle --no-write) is new now.
+    if output_pending(path):
+        return dt.date.today()
+    return dt.datetime.fromtimestamp(path.stat().st_mtime).date()
+
+
+def first_commit_date(path: Path) -> dt.date:
+    rel = rel_path(path)
+    if rel in dirty_paths() and rel not in history():
+        return mtime_date(path)
+    dates = history().get(rel)
+    return dt.date.fromisoformat(dates[0]) if dates and dates[0] else mtime_date(path)
+
+
+def last_modified_date(path: Path) -> dt.date:
+    rel = rel_path(path)
+    dates = history().get(rel)
+    # `git status` is read once per process, so a page this build rewrote
+    # after that is dirty without being listed there.
+    if rel in dirty_paths() or was_written(path) or not dates or output_pending(path):
+        return mtime_date(path)
+    return dt.date.fromisoformat(dates[1])
+
+
+def main() -> None:
+    for arg in sys.argv[1:]:
+        path = Path(arg)
+        print(f"{arg}: first {first_commit_date(path)}, last {last_modified_date(path)}")
+
+
+if __name__ == "__main__":
+    main()
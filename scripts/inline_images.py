@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Embed small local images in rendered article HTML as data URIs.
+
+Every <img> the renderer emits (markdown images, chat images and raw <img>
+lines) whose local file is at most the byte threshold gets a base64 data URI
+instead of its path, saving one request per image; larger images and remote
+sources stay external. An image used several times on a page is one request
+saved, not several. Encoded URIs are only kept for the current build, keyed
+by the file's path, size and mtime, so nothing large is hashed or persisted.
+"""
+from __future__ import annotations
+
+import base64
+import html
+import mimetypes
+import re
+from pathlib import Path
+
+from page_budget import local_file
+
+IMG_SRC_RE = re.compile(r'(<img\b[^>]*?\bsrc=")([^"]+)(")', re.IGNORECASE)
+
+_cache: dict[tuple[Path, int, int], str] = {}
+
+
+def data_uri(path: Path) -> str | None:
+    mime = mimetypes.guess_type(path.name)[0]
+    if not mime or not mime.startswith("image/"):
+        return None
+    stat = path.stat()
+    key = (path.resolve(), stat.st_size, stat.st_mtime_ns)
+    if key not in _cache:
+        _cache[key] = f"data:{mime};base64,{base64.b64encode(path.read_bytes()).decode('ascii')}"
+    return _cache[key]
+
+
+def inline_small_images(article_html: str, page: Path, max_bytes: int) -> tuple[str, int]:
+    """Inline local images of at most ``max_bytes``.
+
+    Returns the HTML and the number of requests saved (distinct files inlined).
+    """
+    inlined: set[Path] = set()
+
+    def sub(m: re.Match[str]) -> str:
+        path = local_file(page, html.unescape(m.group(2)))
+        if path is None or not path.is_file() or path.stat().st_size > max_bytes:
+            return m.group(0)
+        uri = data_uri(path)
+        if uri is None:
+            return m.group(0)
+        inlined.add(path.resolve())
+        return m.group(1) + uri + m.group(3)
+
+    if max_bytes <= 0:
+        return article_html, 0
+    return IMG_SRC_RE.sub(sub, article_html), len(inlined)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Stream the deployable site into one deterministic tar bundle.
+
+Every deployable file (article pages, indexes, sitemap, redirects, headers,
+service worker and assets) is read once, hashed and appended in sorted order
+with fixed ownership, permissions and timestamps, so the same tree always
+gives the same bytes. The deploy manifest (path, size and SHA-256 of every
+entry) is embedded as the last entry, so a deploy step can upload or diff the
+bundle without unpacking it. ".gz" output is gzip-compressed, also without
+timestamps.
+
+Run from build_articles.py --bundle, the pages and other outputs come
+straight from the build's memory rather than being read back from the tree
+(which --no-write leaves untouched).
+
+Usage:
+  python scripts/make_bundle.py --out site.tar.gz
+  SOURCE_DATE_EPOCH=1700000000 python scripts/make_bundle.py --out site.tar
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import io
+import os
+import tarfile
+from pathlib import Path
+from typing import BinaryIO
+
+from deploy_manifest import BUNDLE_SUFFIXES, MANIFEST_NAME, deployable_files, dump_manifest, is_deployable
+from site_io import atomic_output, held_outputs, read_output_bytes
+
+ROOT = Path(__file__).resolve().parents[1]
+FILE_MODE = 0o644
+
+
+def bundle_mtime() -> int:
+    return int(os.environ.get("SOURCE_DATE_EPOCH", "0"))
+
+
+def add_entry(tar: tarfile.TarFile, name: str, data: bytes, mtime: int) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = mtime
+    info.mode = FILE_MODE
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    tar.addfile(info, io.BytesIO(data))
+
+
+def bundle_files(root: Path) -> list[tuple[str, Path]]:
+    # The tree, plus outputs the build holds but has not written to it.
+    files = dict(deployable_files(root))
+    for path in held_outputs():
+        if path.is_relative_to(root) and is_deployable(path.relative_to(root)):
+            files.setdefault(path.relative_to(root).as_posix(), path)
+    return sorted(files.items())
+
+
+def write_bundle(root: Path, fh: BinaryIO) -> dict[str, dict[str, int | str]]:
+    mtime = bundle_mtime()
+    files: dict[str, dict[str, int | str]] = {}
+    with tarfile.open(fileobj=fh, mode="w", format=tarfile.PAX_FORMAT) as tar:
+        for rel, path in bundle_files(root):
+            data = read_output_bytes(path)
+            files[rel] = {"size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+            add_entry(tar, rel, data, mtime)
+        add_entry(tar, MANIFEST_NAME, dump_manifest(files).encode("utf-8"), mtime)
+    return files
+
+
+def bundle_site(out: Path) -> dict[str, dict[str, int | str]]:
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_output(out) as raw:
+        if out.name.endswith(".tar"):
+            files = write_bundle(ROOT, raw)
+        else:
+            with gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=bundle_mtime()) as gz:
+                files = write_bundle(ROOT, gz)
+    return files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, required=True, help="bundle path (.tar, .tar.gz or .tgz)")
+    args = parser.parse_args()
+    if not args.out.name.endswith(BUNDLE_SUFFIXES):
+        parser.error(f"--out must end with one of {', '.join(BUNDLE_SUFFIXES)}")
+
+    out = args.out.resolve()
+    files = bundle_site(out)
+    total = sum(int(entry["size"]) for entry in files.values())
+    print(f"Wrote {out} with {len(files)} file(s) ({total} bytes before packing).")
+
+
+if __name__ == "__main__":
+    main()
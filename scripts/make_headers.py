@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Generate /_headers with Link preconnect/preload hints for every page.
+
+Cloudflare Pages turns Link headers into 103 Early Hints, so the browser can
+open the font origins (or fetch the self-hosted fonts) and a page's stylesheets
+and lead image before the HTML arrives. Hints shared by every page go under one /* rule; each page only
+gets a rule for the hints that are specific to it. Cloudflare Pages' rule
+limits are enforced.
+
+Usage:
+  python scripts/make_headers.py
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import quote
+
+from page_budget import collect_pages, local_file
+from site_io import read_output_text, write_if_changed
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT = ROOT / "_headers"
+# Cloudflare Pages limits for _headers.
+MAX_HEADER_RULES = 100
+MAX_LINE_LENGTH = 2000
+
+
+class HintScanner(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.in_head = True
+        self.hints: list[str] = []
+        self.first_image = ""
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        attr = {k.lower(): (v or "") for k, v in attrs}
+        if tag == "body":
+            self.in_head = False
+        elif tag == "img" and not self.first_image:
+            self.first_image = attr.get("src", "")
+        elif self.in_head and tag == "link" and attr.get("href"):
+            rels = attr.get("rel", "").lower().split()
+            href = attr["href"]
+            if "preconnect" in rels:
+                self.hints.append(f"<{href}>; rel=preconnect" + ("; crossorigin" if "crossorigin" in attr else ""))
+            elif "stylesheet" in rels and href.startswith("/"):
+                # Cross-origin stylesheets (Google Fonts) are covered by their
+                # preconnect: the query string holds "," and ";", which the
+                # header merge would split.
+                self.hints.append(f"<{href}>; rel=preload; as=style")
+            elif "preload" in rels and href.startswith("/") and attr.get("as"):
+                # Self-hosted fonts (scripts/subset_fonts.py).
+                self.hints.append(f"<{href}>; rel=preload; as={attr['as']}" + ("; crossorigin" if "crossorigin" in attr else ""))
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "head":
+            self.in_head = False
+
+
+def page_url(page: Path) -> str:
+    rel = page.relative_to(ROOT).as_posix()
+    if rel == "index.html":
+        return "/"
+    if rel.endswith("/index.html"):
+        return "/" + rel[: -len("index.html")]
+    return "/" + rel
+
+
+def page_hints(page: Path) -> list[str]:
+    scanner = HintScanner()
+    scanner.feed(read_output_text(page))
+    hints = list(dict.fromkeys(scanner.hints))
+    image = local_file(page, scanner.first_image) if scanner.first_image else None
+    if image is not None and image.is_file():
+        hints.append(f"</{quote(image.relative_to(ROOT).as_posix())}>; rel=preload; as=image")
+    return hints
+
+
+def group_rules(pages: dict[str, list[str]]) -> list[tuple[str, list[str]]]:
+    shared = [h for h in next(iter(pages.values()), []) if all(h in hints for hints in pages.values())]
+    rules = [("/*", shared)] if shared else []
+    for url, hints in pages.items():
+        extra = [h for h in hints if h not in shared]
+        if extra:
+            rules.append((url, extra))
+    if len(rules) > MAX_HEADER_RULES:
+        for url, _ in rules[MAX_HEADER_RULES:]:
+            print(f"warning: no page-specific hints for {url}; over the {MAX_HEADER_RULES}-rule limit", file=sys.stderr)
+        rules = rules[:MAX_HEADER_RULES]
+    return rules
+
+
+def render_rules(rules: list[tuple[str, list[str]]]) -> str:
+    lines = [
+        "# Early Hints for Cloudflare Pages",
+        "# Generated by scripts/make_headers.py from the built pages; do not edit by hand.",
+    ]
+    for url, hints in rules:
+        lines.append(url)
+        lines.extend(f"  Link: {hint}" for hint in hints)
+    for line in lines:
+        if len(line) > MAX_LINE_LENGTH:
+            raise ValueError(f"header line longer than {MAX_LINE_LENGTH} characters: {line[:80]}...")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str] | None = None) -> None:
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args(argv)
+    pages = {page_url(p): page_hints(p) for p in collect_pages()}
+    try:
+        rules = group_rules(pages)
+        text = render_rules(rules)
+    except ValueError as exc:
+        sys.exit(f"Headers failed: {exc}")
+    if write_if_changed(OUT, text):
+        print(f"Wrote {OUT} with {len(rules)} rule(s) for {len(pages)} page(s).")
+    else:
+        print(f"Unchanged {OUT} with {len(rules)} rule(s) for {len(pages)} page(s).")
+
+
+if __name__ == "__main__":
+    main()
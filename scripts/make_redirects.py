@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""Generate /_redirects from a declarative map plus the legacy article sources.
+
+Every static rule is resolved to its final destination so a request takes a
+single hop. That includes requests on another origin (http://, www.): each
+static path rule gets a twin per origin splat, so an http:// request for an
+old URL goes straight to its https:// destination. Redirect loops fail the
+build. Rules that an earlier rule already
+shadows are dropped with a warning. Cloudflare Pages' rule limits are
+enforced, and static rules are folded into splats when there are too many.
+
+Usage:
+  python scripts/make_redirects.py
+"""
+from __future__ import annotations
+
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from deploy_manifest import is_deployable
+from site_io import output_exists, write_if_changed
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT = ROOT / "_redirects"
+SITE = "https://scottlabbe.me"
+SITE_HOSTS = {"scottlabbe.me", "www.scottlabbe.me"}
+LINK_ATTR_RE = re.compile(r'(\s(?:href|src)=")([^"]+)(")', re.IGNORECASE)
+ABSOLUTE_URL_RE = re.compile(r"^https?://([^/?#]+)", re.IGNORECASE)
+# Hand-maintained rules, in match order. Legacy /articles/data/Articles/*.html
+# sources are added from the enhancer and need no entry here.
+REDIRECTS: list[tuple[str, str, int]] = [
+    ("/about", "/", 301),
+    ("/about/", "/", 301),
+    ("/index.html", "/", 301),
+    ("/articles/medicaid_intelligence_case_study/", "/articles/medicaid-intelligence-case-study/", 301),
+    ("http://scottlabbe.me/*", "https://scottlabbe.me/:splat", 301),
+    ("http://www.scottlabbe.me/*", "https://scottlabbe.me/:splat", 301),
+]
+# Cloudflare Pages limits for _redirects.
+MAX_STATIC_RULES = 2000
+MAX_DYNAMIC_RULES = 100
+MAX_LINE_LENGTH = 1000
+MAX_HOPS = 10
+
+Rule = tuple[str, str, int]
+
+
+def is_dynamic(source: str) -> bool:
+    return "*" in source or "/:" in source
+
+
+def source_pattern(source: str) -> re.Pattern[str]:
+    parts: list[str] = []
+    for token in re.split(r"(\*|:[A-Za-z]\w*)", source):
+        if token == "*":
+            parts.append("(?P<splat>.*)")
+        elif token.startswith(":") and len(token) > 1:
+            parts.append(f"(?P<{token[1:]}>[^/]+)")
+        else:
+            parts.append(re.escape(token))
+    return re.compile("".join(parts))
+
+
+def match_rule(rule: Rule, url: str) -> str | None:
+    source, target, _ = rule
+    if not is_dynamic(source):
+        return target if url == source else None
+    m = source_pattern(source).fullmatch(url)
+    if not m:
+        return None
+    for name, value in m.groupdict().items():
+        target = target.replace(f":{name}", value)
+    return target
+
+
+def site_path(url: str) -> str:
+    # Targets on the canonical origin are matched against path rules again.
+    if url == SITE or url.startswith(SITE + "/"):
+        return url[len(SITE) :] or "/"
+    return url
+
+
+def canonical_target(url: str) -> str:
+    path = site_path(url)
+    if not path.startswith("/"):
+        return url
+    base, sep, tail = path.partition("?")
+    if base.endswith("/index.html"):
+        base = base[: -len("index.html")]
+    elif not base.endswith("/") and output_exists(ROOT / base.lstrip("/") / "index.html"):
+        base += "/"
+    return base + sep + tail
+
+
+def resolve(url: str, rules: list[Rule]) -> tuple[str, int]:
+    """Follow ``url`` through ``rules``; return the final URL and hop count.
+
+    Raises ValueError on a redirect loop.
+    """
+    seen = [url]
+    current = url
+    for hops in range(MAX_HOPS + 1):
+        for rule in rules:
+            target = match_rule(rule, current)
+            if target is not None:
+                break
+        else:
+            return current, hops
+        current = canonical_target(target)
+        if current in seen:
+            raise ValueError("redirect loop: " + " -> ".join(seen + [current]))
+        seen.append(current)
+    raise ValueError(f"redirect chain longer than {MAX_HOPS} hops: " + " -> ".join(seen))
+
+
+def load_rules(path: Path = OUT) -> list[Rule]:
+    rules: list[Rule] = []
+    if not path.exists():
+        return rules
+    for raw in path.read_text(encoding="utf-8").splitlines():
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = line.split()
+        if len(fields) < 2:
+            continue
+        status = int(fields[2]) if len(fields) > 2 and fields[2].isdigit() else 302
+        rules.append((fields[0], fields[1], status))
+    return rules
+
+
+def drop_shadowed(rules: list[Rule]) -> list[Rule]:
+    kept: list[Rule] = []
+    for rule in rules:
+        source = rule[0]
+        shadow = next(
+            (
+                earlier
+                for earlier in kept
+                if earlier[0] == source or (not is_dynamic(source) and match_rule(earlier, source) is not None)
+            ),
+            None,
+        )
+        if shadow:
+            print(f"warning: {source} is shadowed by earlier rule {shadow[0]}; dropped", file=sys.stderr)
+            continue
+        kept.append(rule)
+    return kept
+
+
+def collapse_chains(rules: list[Rule]) -> list[Rule]:
+    collapsed: list[Rule] = []
+    for source, target, status in rules:
+        if is_dynamic(source):
+            collapsed.append((source, target, status))
+            continue
+        final, _ = resolve(canonical_target(target), rules)
+        if final == source:
+            raise ValueError(f"redirect loop: {source} -> {target} -> ... -> {source}")
+        collapsed.append((source, final, status))
+    return collapsed
+
+
+def origin_rules(rules: list[Rule]) -> list[Rule]:
+    # An origin splat (http://scottlabbe.me/* -> https://scottlabbe.me/:splat)
+    # followed by a path rule is two hops; these rules do both at once.
+    origins = [
+        source[: -len("/*")]
+        for source, target, _ in rules
+        if source.endswith("/*") and ABSOLUTE_URL_RE.match(source) and target == SITE + "/:splat"
+    ]
+    return [
+        (origin + source, SITE + target if target.startswith("/") else target, status)
+        for origin in origins
+        for source, target, status in rules
+        if source.startswith("/") and not is_dynamic(source)
+    ]
+
+
+def serves_files(url_dir: str) -> bool:
+    directory = ROOT / url_dir.lstrip("/")
+    return directory.is_dir() and any(
+        p.is_file() and is_deployable(p.relative_to(ROOT)) for p in directory.rglob("*")
+    )
+
+
+def compact(rules: list[Rule]) -> list[Rule]:
+    static = [r for r in rules if not is_dynamic(r[0])]
+    if len(static) <= MAX_STATIC_RULES:
+        return rules
+    # Fold rules of the form <dir>/<name> -> <target dir>/<name> into one
+    # splat, but only when nothing is served from <dir> and every static rule
+    # in it maps the same way. Largest groups go first.
+    groups: dict[tuple[str, str, int], list[Rule]] = defaultdict(list)
+    per_dir: dict[str, int] = defaultdict(int)
+    for rule in static:
+        source, target, status = rule
+        src_dir, _, name = source.rpartition("/")
+        per_dir[src_dir] += 1
+        if name and target.endswith("/" + name):
+            groups[(src_dir, target[: -len(name)], status)].append(rule)
+    excess = len(static) - MAX_STATIC_RULES
+    folded: set[Rule] = set()
+    splats: list[Rule] = []
+    for (src_dir, tgt_dir, status), members in sorted(groups.items(), key=lambda kv: -len(kv[1])):
+        if excess <= 0:
+            break
+        if len(members) < 2 or per_dir[src_dir] != len(members):
+            continue
+        if serves_files(src_dir):
+            continue
+        folded.update(members)
+        splats.append((f"{src_dir}/*", f"{tgt_dir}:splat", status))
+        excess -= len(members) - 1
+    kept = [r for r in rules if r not in folded]
+    first_dynamic = next((i for i, r in enumerate(kept) if is_dynamic(r[0])), len(kept))
+    return kept[:first_dynamic] + splats + kept[first_dynamic:]
+
+
+def check_limits(rules: list[Rule]) -> None:
+    static = sum(1 for r in rules if not is_dynamic(r[0]))
+    dynamic = len(rules) - static
+    if static > MAX_STATIC_RULES:
+        raise ValueError(f"{static} static redirects exceed the {MAX_STATIC_RULES}-rule limit")
+    if dynamic > MAX_DYNAMIC_RULES:
+        raise ValueError(f"{dynamic} dynamic redirects exceed the {MAX_DYNAMIC_RULES}-rule limit")
+    for line in render_rules(rules).splitlines():
+        if len(line) > MAX_LINE_LENGTH:
+            raise ValueError(f"redirect line longer than {MAX_LINE_LENGTH} characters: {line[:80]}...")
+
+
+def render_rules(rules: list[Rule]) -> str:
+    lines = [
+        "# Redirects for Cloudflare Pages",
+        "# Generated by scripts/make_redirects.py; edit REDIRECTS there instead.",
+    ]
+    lines.extend(f"{source}  {target}  {status}" for source, target, status in rules)
+    return "\n".join(lines) + "\n"
+
+
+def canonical_link(url: str, rules: list[Rule]) -> str:
+    """Return the final destination of an internal link, or ``url`` unchanged."""
+    base, hash_sep, fragment = url.partition("#")
+    path, query_sep, query = base.partition("?")
+    host = ABSOLUTE_URL_RE.match(path)
+    if host:
+        if host.group(1).lower() not in SITE_HOSTS:
+            return url
+    elif not path.startswith("/") or path.startswith("//"):
+        return url
+    try:
+        final, _ = resolve(canonical_target(path), rules)
+    except ValueError:
+        return url
+    final = site_path(final)
+    if host and final.startswith("/"):
+        final = SITE + final
+    return final + query_sep + query + hash_sep + fragment
+
+
+def rewrite_links(page: str, rules: list[Rule]) -> tuple[str, int]:
+    """Point internal href/src attributes straight at their final targets."""
+    count = 0
+
+    def sub(m: re.Match[str]) -> str:
+        nonlocal count
+        target = canonical_link(m.group(2), rules)
+        if target == m.group(2):
+            return m.group(0)
+        count += 1
+        return f"{m.group(1)}{target}{m.group(3)}"
+
+    return LINK_ATTR_RE.sub(sub, page), count
+
+
+def build_rules() -> list[Rule]:
+    # Imported here because the enhancer imports this module for rewrite_links.
+    from enhance_legacy_articles_seo import legacy_source_redirects
+
+    static = [r for r in REDIRECTS if not is_dynamic(r[0])]
+    dynamic = [r for r in REDIRECTS if is_dynamic(r[0])]
+    legacy = [(source, target, 301) for source, target in sorted(legacy_source_redirects().items())]
+    # Static rules go first so catch-all splats never shadow them.
+    rules = collapse_chains(drop_shadowed(static + legacy + dynamic))
+    static = [r for r in rules if not is_dynamic(r[0])]
+    dynamic = [r for r in rules if is_dynamic(r[0])]
+    rules = compact(static + origin_rules(rules) + dynamic)
+    check_limits(rules)
+    return rules
+
+
+def write_redirects(rules: list[Rule]) -> None:
+    if write_if_changed(OUT, render_rules(rules)):
+        print(f"Wrote {OUT} with {len(rules)} rule(s).")
+    else:
+        print(f"Unchanged {OUT} with {len(rules)} rule(s).")
+
+
+def main() -> None:
+    try:
+        rules = build_rules()
+    except ValueError as exc:
+        sys.exit(f"Redirects failed: {exc}")
+    write_redirects(rules)
+
+
+if __name__ == "__main__":
+    main()
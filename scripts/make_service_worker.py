@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Generate /sw.js with a content-hashed precache manifest.
+
+The manifest covers the core assets (and self-hosted fonts), the home and
+articles index pages and the newest few articles. Each entry carries a
+revision hash of the file, so sw.js only changes (and browsers only
+re-download entries) when one of those files changes.
+
+Pages, precached or not, are served stale-while-revalidate from a capped
+page cache; a precached copy only answers until that cache holds the page.
+Assets in the manifest are served from the precache, Google Fonts
+stale-while-revalidate from a capped font cache, and images cache-first up to
+an entry and size cap.
+
+Usage:
+  python scripts/make_service_worker.py
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+from generate_articles_index import article_url, collect_articles
+from site_io import output_exists, read_output_bytes, write_if_changed
+from subset_fonts import font_outputs
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT = ROOT / "sw.js"
+CORE_FILES = {
+    "/": ROOT / "index.html",
+    "/articles/": ROOT / "articles" / "index.html",
+    "/assets/css/main.css": ROOT / "assets" / "css" / "main.css",
+    "/assets/css/highlight.css": ROOT / "assets" / "css" / "highlight.css",
+    "/assets/js/main.js": ROOT / "assets" / "js" / "main.js",
+}
+PRECACHE_ARTICLES = 5
+PAGE_CACHE_MAX_ENTRIES = 30
+FONT_CACHE_MAX_ENTRIES = 30
+IMAGE_CACHE_MAX_ENTRIES = 60
+IMAGE_CACHE_MAX_BYTES = 2 * 1024 * 1024  # larger images are never cached
+
+SW_TEMPLATE = """// Generated by scripts/make_service_worker.py; do not edit by hand.
+const PRECACHE = 'precache';
+const PAGES = 'pages';
+const IMAGES = 'images';
+const FONTS = 'fonts';
+const MANIFEST = __MANIFEST__;
+const PAGE_MAX_ENTRIES = __PAGE_MAX_ENTRIES__;
+const FONT_MAX_ENTRIES = __FONT_MAX_ENTRIES__;
+const IMAGE_MAX_ENTRIES = __IMAGE_MAX_ENTRIES__;
+const IMAGE_MAX_BYTES = __IMAGE_MAX_BYTES__;
+
+const cacheKey = (entry) => `${entry.url}?__rev=${entry.revision}`;
+const precacheKeys = new Map(MANIFEST.map((entry) => [entry.url, cacheKey(entry)]));
+
+self.addEventListener('install', (event) => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(PRECACHE);
+    // Only entries whose revision changed are fetched again.
+    await Promise.all(MANIFEST.map(async (entry) => {
+      const key = cacheKey(entry);
+      if (await cache.match(key)) return;
+      const response = await fetch(entry.url, { cache: 'no-cache' });
+      if (response.ok) await cache.put(key, response);
+    }));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(PRECACHE);
+    const current = new Set(precacheKeys.values());
+    for (const request of await cache.keys()) {
+      const url = new URL(request.url);
+      if (!current.has(url.pathname + url.search)) await cache.delete(request);
+    }
+    await self.clients.claim();
+  })());
+});
+
+async function trimCache(name, maxEntries) {
+  const cache = await caches.open(name);
+  const keys = await cache.keys();
+  for (const request of keys.slice(0, Math.max(0, keys.length - maxEntries))) {
+    await cache.delete(request);
+  }
+}
+
+async function staleWhileRevalidate(event, name, maxEntries, precacheKey) {
+  const cache = await caches.open(name);
+  // A precached page stands in until the page cache has its own copy.
+  const cached = await cache.match(event.request)
+    || (precacheKey && await (await caches.open(PRECACHE)).match(precacheKey));
+  const network = fetch(event.request).then((response) => {
+    // Cross-origin font requests come back opaque but are still cacheable.
+    if (response.ok || response.type === 'opaque') {
+      event.waitUntil(cache.put(event.request, response.clone()).then(() => trimCache(name, maxEntries)));
+    }
+    return response;
+  });
+  if (cached) {
+    event.waitUntil(network.catch(() => {}));
+    return cached;
+  }
+  return network;
+}
+
+async function cacheImage(request, response) {
+  // Chunked or compressed responses carry no usable content-length, so the
+  // body itself is measured; a declared length over the cap skips that.
+  if (Number(response.headers.get('content-length') || 0) > IMAGE_MAX_BYTES) {
+    await response.body?.cancel();
+    return;
+  }
+  const body = await response.blob();
+  if (body.size === 0 || body.size > IMAGE_MAX_BYTES) return;
+  const cache = await caches.open(IMAGES);
+  await cache.put(request, new Response(body, {
+    status: response.status,
+    statusText: response.statusText,
+    headers: response.headers,
+  }));
+  await trimCache(IMAGES, IMAGE_MAX_ENTRIES);
+}
+
+async function imageCacheFirst(event) {
+  const cache = await caches.open(IMAGES);
+  const cached = await cache.match(event.request);
+  if (cached) return cached;
+  const response = await fetch(event.request);
+  if (response.ok) event.waitUntil(cacheImage(event.request, response.clone()));
+  return response;
+}
+
+self.addEventListener('fetch', (event) => {
+  const { request } = event;
+  if (request.method !== 'GET') return;
+  const url = new URL(request.url);
+
+  if (url.origin === self.location.origin) {
+    const key = precacheKeys.get(url.pathname);
+    if (request.mode === 'navigate' || (url.pathname.startsWith('/articles/') && url.pathname.endsWith('/'))) {
+      event.respondWith(staleWhileRevalidate(event, PAGES, PAGE_MAX_ENTRIES, key));
+      return;
+    }
+    if (key) {
+      event.respondWith(caches.open(PRECACHE)
+        .then((cache) => cache.match(key))
+        .then((cached) => cached || fetch(request)));
+      return;
+    }
+    if (request.destination === 'image') {
+      event.respondWith(imageCacheFirst(event));
+    }
+    return;
+  }
+
+  if (url.hostname === 'fonts.googleapis.com' || url.hostname === 'fonts.gstatic.com') {
+    event.respondWith(staleWhileRevalidate(event, FONTS, FONT_MAX_ENTRIES));
+  }
+});
+"""
+
+
+def file_revision(path: Path) -> str:
+    return hashlib.sha256(read_output_bytes(path)).hexdigest()[:16]
+
+
+def precache_manifest() -> list[dict[str, str]]:
+    entries = [
+        {"url": url, "revision": file_revision(path)}
+        for url, path in {**CORE_FILES, **font_outputs()}.items()
+        if output_exists(path)
+    ]
+    for item in collect_articles()[:PRECACHE_ARTICLES]:
+        entries.append({"url": article_url(item["slug"]), "revision": file_revision(Path(item["file"]))})
+    return entries
+
+
+def render_service_worker(manifest: list[dict[str, str]]) -> str:
+    return (
+        SW_TEMPLATE.replace("__MANIFEST__", json.dumps(manifest, indent=2))
+        .replace("__PAGE_MAX_ENTRIES__", str(PAGE_CACHE_MAX_ENTRIES))
+        .replace("__FONT_MAX_ENTRIES__", str(FONT_CACHE_MAX_ENTRIES))
+        .replace("__IMAGE_MAX_ENTRIES__", str(IMAGE_CACHE_MAX_ENTRIES))
+        .replace("__IMAGE_MAX_BYTES__", str(IMAGE_CACHE_MAX_BYTES))
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args(argv)
+    manifest = precache_manifest()
+    if write_if_changed(OUT, render_service_worker(manifest)):
+        print(f"Wrote {OUT} with {len(manifest)} precached URL(s).")
+    else:
+        print(f"Unchanged {OUT} with {len(manifest)} precached URL(s).")
+
+
+if __name__ == "__main__":
+    main()
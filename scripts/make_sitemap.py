@@ -1,15 +1,19 @@
+import argparse
+from io import BytesIO
 from pathlib import Path
-from datetime import datetime, timezone
 import xml.etree.ElementTree as ET
 
+from git_dates import last_modified_date
+from site_io import glob_outputs, write_if_changed
+
 SITE = "https://scottlabbe.me"
 BUILD_DIR = Path(".")  # run from /Users/scottlabbe/Projects/website
 EXCLUDE_DIRS = {"assets", "scripts", ".git"}  # tweak if you add more later
 SKIP_FILES = {"404.html"}  # add any utility pages you don't want indexed
 SKIP_PATHS = {"about/index.html"}  # redirect-only page
 
-def is_excluded(path: Path) -> bool:
-    if any(part.startswith(".") or part in EXCLUDE_DIRS for part in path.parts):
+def is_excluded(path: Path, exclude_dirs: set[str] = EXCLUDE_DIRS) -> bool:
+    if any(part.startswith(".") or part in exclude_dirs for part in path.parts):
         return True
     # Skip legacy article sources; only clean slugs should be indexed.
     parts = set(path.parts)
@@ -29,21 +33,34 @@ def to_url(path: Path) -> str:
         rel = "/" + rel
     return SITE + rel
 
-urlset = ET.Element("urlset", xmlns="http://www.sitemaps.org/schemas/sitemap/0.9")
-
-count = 0
-for html in BUILD_DIR.rglob("*.html"):
-    if html.name in SKIP_FILES or is_excluded(html):
-        continue
-    rel_path = html.relative_to(BUILD_DIR).as_posix()
-    if rel_path in SKIP_PATHS:
-        continue
-    url = ET.SubElement(urlset, "url")
-    ET.SubElement(url, "loc").text = to_url(html)
-    lastmod = datetime.fromtimestamp(html.stat().st_mtime, tz=timezone.utc).date().isoformat()
-    ET.SubElement(url, "lastmod").text = lastmod
-    count += 1
-
-out = BUILD_DIR / "sitemap.xml"
-ET.ElementTree(urlset).write(out, encoding="utf-8", xml_declaration=True)
-print(f"Wrote {out} with {count} URLs")
+def build_sitemap() -> tuple[bytes, int]:
+    urlset = ET.Element("urlset", xmlns="http://www.sitemaps.org/schemas/sitemap/0.9")
+
+    count = 0
+    for html in glob_outputs(BUILD_DIR, "**/*.html"):
+        if html.name in SKIP_FILES or is_excluded(html):
+            continue
+        rel_path = html.relative_to(BUILD_DIR).as_posix()
+        if rel_path in SKIP_PATHS:
+            continue
+        url = ET.SubElement(urlset, "url")
+        ET.SubElement(url, "loc").text = to_url(html)
+        lastmod = last_modified_date(html).isoformat()
+        ET.SubElement(url, "lastmod").text = lastmod
+        count += 1
+
+    buf = BytesIO()
+    ET.ElementTree(urlset).write(buf, encoding="utf-8", xml_declaration=True)
+    return buf.getvalue(), count
+
+def main(argv: list[str] | None = None) -> None:
+    argparse.ArgumentParser(description="Generate sitemap.xml for the pages under the current directory.").parse_args(argv)
+    data, count = build_sitemap()
+    out = BUILD_DIR / "sitemap.xml"
+    if write_if_changed(out, data):
+        print(f"Wrote {out} with {count} URLs")
+    else:
+        print(f"Unchanged {out} with {count} URLs")
+
+if __name__ == "__main__":
+    main()
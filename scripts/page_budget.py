@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Report per-page weight and check it against performance budgets.
+
+For every deployable HTML page this measures the HTML size, the number of
+render-blocking resources in <head>, the total bytes of referenced local
+images and the largest single image. Writes a JSON and a Markdown report
+sorted by total weight, and with --fail exits non-zero when a budget is
+exceeded.
+
+Usage:
+  python scripts/page_budget.py
+  python scripts/page_budget.py --fail --budget image_bytes=4000000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from deploy_manifest import is_deployable
+from site_io import glob_outputs, read_output_bytes, write_if_changed
+
+ROOT = Path(__file__).resolve().parents[1]
+REPORT_DIR = ROOT / ".build-reports"
+BUDGETS: dict[str, int] = {
+    "html_bytes": 100_000,
+    "render_blocking": 3,
+    "image_bytes": 3_000_000,
+    "largest_image_bytes": 1_000_000,
+}
+
+
+class PageScanner(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.in_head = True
+        self.blocking: list[str] = []
+        self.images: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        attr = {k.lower(): (v or "") for k, v in attrs}
+        if tag == "body":
+            self.in_head = False
+        elif tag == "img" and attr.get("src"):
+            self.images.append(attr["src"])
+        elif self.in_head and tag == "link":
+            rels = attr.get("rel", "").lower().split()
+            if "stylesheet" in rels and attr.get("media", "all") in {"all", "screen", ""}:
+                self.blocking.append(attr.get("href", ""))
+        elif self.in_head and tag == "script" and attr.get("src"):
+            if not ({"async", "defer"} & attr.keys()) and attr.get("type", "") != "module":
+                self.blocking.append(attr["src"])
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "head":
+            self.in_head = False
+
+
+def local_file(page: Path, src: str) -> Path | None:
+    parts = urlsplit(src)
+    if parts.scheme or parts.netloc or src.startswith("data:"):
+        return None
+    path = unquote(parts.path)
+    if path.startswith("/"):
+        return ROOT / path.lstrip("/")
+    return page.parent / path
+
+
+def measure(page: Path) -> dict:
+    scanner = PageScanner()
+    data = read_output_bytes(page)
+    scanner.feed(data.decode("utf-8", errors="ignore"))
+    images: dict[str, int] = {}
+    missing: list[str] = []
+    for src in dict.fromkeys(scanner.images):
+        path = local_file(page, src)
+        if path is None:
+            continue
+        if path.is_file():
+            images[src] = path.stat().st_size
+        else:
+            missing.append(src)
+    largest = max(images.items(), key=lambda kv: kv[1], default=("", 0))
+    return {
+        "page": page.relative_to(ROOT).as_posix(),
+        "html_bytes": len(data),
+        "render_blocking": len(scanner.blocking),
+        "render_blocking_resources": scanner.blocking,
+        "image_count": len(images),
+        "image_bytes": sum(images.values()),
+        "largest_image": largest[0],
+        "largest_image_bytes": largest[1],
+        "missing_images": missing,
+        "total_bytes": len(data) + sum(images.values()),
+    }
+
+
+def collect_pages() -> list[Path]:
+    return [p for p in glob_outputs(ROOT, "**/*.html") if is_deployable(p.relative_to(ROOT))]
+
+
+def check(report: dict, budgets: dict[str, int]) -> list[str]:
+    return [
+        f"{key} {report[key]} > {limit}"
+        for key, limit in budgets.items()
+        if report[key] > limit
+    ]
+
+
+def render_markdown_report(reports: list[dict], budgets: dict[str, int]) -> str:
+    lines = [
+        "# Page weight report",
+        "",
+        "Budgets: " + ", ".join(f"`{k}` ≤ {v:,}" for k, v in budgets.items()),
+        "",
+        "| Page | Total | HTML | Blocking | Images | Largest image | Over budget |",
+        "| --- | ---: | ---: | ---: | ---: | --- | --- |",
+    ]
+    for r in reports:
+        largest = f"{r['largest_image']} ({r['largest_image_bytes']:,})" if r["largest_image"] else ""
+        lines.append(
+            f"| {r['page']} | {r['total_bytes']:,} | {r['html_bytes']:,} | {r['render_blocking']} | "
+            f"{r['image_bytes']:,} ({r['image_count']}) | {largest} | {'; '.join(r['violations'])} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def parse_budget(value: str) -> tuple[str, int]:
+    key, _, limit = value.partition("=")
+    if key not in BUDGETS or not limit.isdigit():
+        raise argparse.ArgumentTypeError(f"expected one of {', '.join(BUDGETS)} as key=integer, got {value!r}")
+    return key, int(limit)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=parse_budget, action="append", default=[], help="override a budget, e.g. html_bytes=150000")
+    parser.add_argument("--fail", action="store_true", help="exit non-zero when any page exceeds a budget")
+    parser.add_argument("--out-dir", type=Path, default=REPORT_DIR, help="where to write page-weight.json/.md")
+    args = parser.parse_args(argv)
+
+    budgets = {**BUDGETS, **dict(args.budget)}
+    reports = [measure(p) for p in collect_pages()]
+    for r in reports:
+        r["violations"] = check(r, budgets)
+    reports.sort(key=lambda r: (-r["total_bytes"], r["page"]))
+
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    write_if_changed(args.out_dir / "page-weight.json", json.dumps({"budgets": budgets, "pages": reports}, indent=2) + "\n")
+    write_if_changed(args.out_dir / "page-weight.md", render_markdown_report(reports, budgets))
+
+    over = [r for r in reports if r["violations"]]
+    for r in over:
+        print(f"Over budget: {r['page']}: {'; '.join(r['violations'])}")
+    for r in reports:
+        for src in r["missing_images"]:
+            print(f"Missing image: {r['page']}: {src}")
+    print(f"Wrote page weight report for {len(reports)} page(s) to {args.out_dir}; {len(over)} over budget.")
+    if over and args.fail:
+        sys.exit(f"{len(over)} page(s) exceed their performance budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Drop inline CSS rules that match nothing on their page.
+
+Article pages carry their styles in inline <style> blocks: the template's
+chat, code and image-pair rules, and the LinkedIn export styles on legacy
+pages, are mostly unused by any given article. For each page this collects
+the tags, classes and ids it actually contains (plus every name the site
+scripts can add at runtime: toggled classes, created elements) and keeps
+only the rules whose selectors could match them. Matching errs towards
+keeping: pseudo-classes, attribute selectors and :not() are ignored,
+:is()/:where()/:has() keep the rule, and @-rules other than @media/@supports
+are never touched. Pruning is idempotent.
+
+Only generated output is pruned: build_articles.py prunes each markdown page
+as it renders it. The legacy pages are hand-maintained sources, so this
+script never rewrites them; it reports the CSS they do not use.
+
+The shared stylesheet (assets/css/main.css) is cached across every page, so
+it is not split; instead the report lists, per page type, the main.css rules
+that type never uses, and the rules no page uses at all.
+
+Usage:
+  python scripts/prune_css.py
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+
+from page_budget import REPORT_DIR, collect_pages
+from site_io import read_output_text, write_if_changed
+
+ROOT = Path(__file__).resolve().parents[1]
+SHARED_CSS = ROOT / "assets" / "css" / "main.css"
+SCRIPTS_DIR = ROOT / "assets" / "js"
+STYLE_BLOCK_RE = re.compile(r"(<style\b[^>]*>)(.*?)(</style>)", re.S | re.I)
+COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+# Class and tag names live in string literals in the site scripts ('open',
+# '.reveal-trigger', createElement('iframe')), and markup strings name tags
+# ('<iframe src=...>'); any such token counts as used, as a tag too.
+SCRIPT_TOKEN_RE = re.compile(r"""['"`][.#]?([A-Za-z_][\w-]*)['"`]""")
+SCRIPT_TAG_RE = re.compile(r"<([A-Za-z][\w-]*)")
+KEEP_PSEUDO_RE = re.compile(r":(?:is|where|has|matches|-\w+-any)\(", re.I)
+NOT_RE = re.compile(r":not\((?:[^()]|\([^()]*\))*\)", re.I)
+PSEUDO_RE = re.compile(r"::?[\w-]+(?:\((?:[^()]|\([^()]*\))*\))?")
+ATTRIBUTE_RE = re.compile(r"\[[^\]]*\]")
+COMBINATOR_RE = re.compile(r"\s*[>+~]\s*|\s+")
+COMPOUND_RE = re.compile(r"^(\*|[A-Za-z][\w-]*)?((?:[.#][\w-]+)*)$")
+NESTED_AT_RULES = ("@media", "@supports")
+
+
+class Features:
+    def __init__(self, tags: set[str], classes: set[str], ids: set[str]) -> None:
+        self.tags = tags | {"html", "body"}
+        self.classes = classes
+        self.ids = ids
+
+
+class FeatureScanner(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.tags: set[str] = set()
+        self.classes: set[str] = set()
+        self.ids: set[str] = set()
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.tags.add(tag)
+        for name, value in attrs:
+            if name == "class" and value:
+                self.classes.update(value.split())
+            elif name == "id" and value:
+                self.ids.add(value)
+
+
+_script_names: set[str] | None = None
+
+
+def script_names() -> set[str]:
+    global _script_names
+    if _script_names is None:
+        _script_names = set()
+        for path in sorted(SCRIPTS_DIR.glob("*.js")):
+            source = path.read_text(encoding="utf-8")
+            _script_names.update(SCRIPT_TOKEN_RE.findall(source))
+            _script_names.update(tag.lower() for tag in SCRIPT_TAG_RE.findall(source))
+    return _script_names
+
+
+def page_features(page_html: str) -> Features:
+    scanner = FeatureScanner()
+    scanner.feed(page_html)
+    names = script_names()
+    return Features(scanner.tags | names, scanner.classes | names, scanner.ids | names)
+
+
+def compound_may_match(compound: str, features: Features) -> bool:
+    m = COMPOUND_RE.match(compound)
+    if m is None:
+        return True  # escapes or syntax this matcher does not know
+    tag, rest = m.group(1), m.group(2)
+    if tag and tag != "*" and tag.lower() not in features.tags:
+        return False
+    for part in re.findall(r"[.#][\w-]+", rest):
+        pool = features.classes if part[0] == "." else features.ids
+        if part[1:] not in pool:
+            return False
+    return True
+
+
+def selector_may_match(selector: str, features: Features) -> bool:
+    if KEEP_PSEUDO_RE.search(selector):
+        return True
+    bare = ATTRIBUTE_RE.sub("", PSEUDO_RE.sub("", NOT_RE.sub("", selector))).strip()
+    return all(compound_may_match(c, features) for c in COMBINATOR_RE.split(bare) if c)
+
+
+def rule_may_match(prelude: str, features: Features) -> bool:
+    selectors = COMMENT_RE.sub("", prelude).split(",")
+    return any(selector_may_match(s.strip(), features) for s in selectors if s.strip())
+
+
+def block_end(css: str, open_brace: int) -> int:
+    depth = 0
+    for i in range(open_brace, len(css)):
+        if css[i] == "{":
+            depth += 1
+        elif css[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(css) - 1
+
+
+def prune_stylesheet(css: str, features: Features) -> str:
+    """Return ``css`` without the rules that cannot match ``features``."""
+    out: list[str] = []
+    pos = 0
+    while True:
+        brace = css.find("{", pos)
+        if brace < 0:
+            out.append(css[pos:])
+            return "".join(out)
+        end = block_end(css, brace)
+        prelude = COMMENT_RE.sub("", css[pos:brace]).strip()
+        if prelude.lower().startswith(NESTED_AT_RULES):
+            inner = prune_stylesheet(css[brace + 1 : end], features)
+            if "{" in inner:
+                out.append(css[pos : brace + 1] + inner + "}")
+        elif prelude.startswith("@") or rule_may_match(prelude, features):
+            out.append(css[pos : end + 1])
+        pos = end + 1
+
+
+def prune_page(page_html: str) -> tuple[str, int]:
+    """Prune every inline <style> block; return the page and bytes removed."""
+    features = page_features(page_html)
+    removed = 0
+
+    def sub(m: re.Match[str]) -> str:
+        nonlocal removed
+        css = prune_stylesheet(m.group(2), features)
+        removed += len(m.group(2).encode("utf-8")) - len(css.encode("utf-8"))
+        return m.group(1) + css + m.group(3)
+
+    return STYLE_BLOCK_RE.sub(sub, page_html), removed
+
+
+def page_type(page: Path) -> str:
+    rel = page.relative_to(ROOT).as_posix()
+    if rel.startswith("articles/") and rel != "articles/index.html":
+        return "article"
+    return rel
+
+
+def shared_rules(css: str, context: str = "") -> list[tuple[str, str]]:
+    # (enclosing @media/@supports, selector list) for every style rule.
+    rules: list[tuple[str, str]] = []
+    pos = 0
+    text = COMMENT_RE.sub("", css)
+    while True:
+        brace = text.find("{", pos)
+        if brace < 0:
+            return rules
+        end = block_end(text, brace)
+        prelude = text[pos:brace].strip()
+        if prelude.lower().startswith(NESTED_AT_RULES):
+            rules.extend(shared_rules(text[brace + 1 : end], prelude))
+        elif not prelude.startswith("@"):
+            rules.append((context, prelude))
+        pos = end + 1
+
+
+def shared_usage(pages: dict[Path, Features]) -> dict:
+    css = SHARED_CSS.read_text(encoding="utf-8")
+    rules = shared_rules(css)
+    labels = [f"{ctx} {{ {p} }}" if ctx else p for ctx, p in rules]
+    by_type: dict[str, list[Features]] = {}
+    for page, features in pages.items():
+        by_type.setdefault(page_type(page), []).append(features)
+    unused_by_type = {
+        kind: [label for (_, p), label in zip(rules, labels) if not any(rule_may_match(p, f) for f in feats)]
+        for kind, feats in sorted(by_type.items())
+    }
+    unused_everywhere = [
+        label for (_, p), label in zip(rules, labels) if not any(rule_may_match(p, f) for f in pages.values())
+    ]
+    return {
+        "stylesheet": SHARED_CSS.relative_to(ROOT).as_posix(),
+        "bytes": len(css.encode("utf-8")),
+        "rules": len(rules),
+        "unused_by_page_type": unused_by_type,
+        "unused_everywhere": unused_everywhere,
+    }
+
+
+def render_markdown_report(pages: list[dict], shared: dict) -> str:
+    total = sum(p["unused_bytes"] for p in pages)
+    lines = [
+        "# CSS pruning",
+        "",
+        f"{total} bytes of inline CSS unused across {len(pages)} page(s).",
+        "",
+        "| Page | Inline CSS | Used | Unused |",
+        "| --- | ---: | ---: | ---: |",
+    ]
+    for p in pages:
+        lines.append(f"| {p['page']} | {p['inline_bytes']} | {p['inline_bytes'] - p['unused_bytes']} | {p['unused_bytes']} |")
+    lines += [
+        "",
+        "Article pages built from markdown are pruned as they are rendered, so they show 0 here. "
+        "Legacy pages are hand-maintained sources and are only reported, never rewritten.",
+    ]
+    lines += ["", f"## {shared['stylesheet']} ({shared['bytes']} bytes, {shared['rules']} rules)", ""]
+    for kind, unused in shared["unused_by_page_type"].items():
+        lines.append(f"- {kind}: {len(unused)} unused rule(s)")
+    lines += ["", "Rules no page uses:", ""]
+    lines += [f"- `{label}`" for label in shared["unused_everywhere"]] or ["- none"]
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args(argv)
+
+    reports: list[dict] = []
+    features: dict[Path, Features] = {}
+    for page in collect_pages():
+        text = read_output_text(page)
+        features[page] = page_features(text)
+        inline = sum(len(m.group(2).encode("utf-8")) for m in STYLE_BLOCK_RE.finditer(text))
+        if not inline:
+            continue
+        _, unused = prune_page(text)
+        reports.append({"page": page.relative_to(ROOT).as_posix(), "inline_bytes": inline, "unused_bytes": unused})
+
+    shared = shared_usage(features)
+    REPORT_DIR.mkdir(exist_ok=True)
+    write_if_changed(REPORT_DIR / "css-prune.json", json.dumps({"pages": reports, "shared": shared}, indent=2) + "\n")
+    write_if_changed(REPORT_DIR / "css-prune.md", render_markdown_report(reports, shared))
+    total = sum(r["unused_bytes"] for r in reports)
+    print(f"Found {total} bytes of unused inline CSS on {len(reports)} page(s) (reported, not removed); "
+          f"{len(shared['unused_everywhere'])} {shared['stylesheet']} rule(s) unused on every page.")
+
+
+if __name__ == "__main__":
+    main()
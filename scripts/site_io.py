@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Shared output helpers for the site build scripts."""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator
+
+
+def _default_mode() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+@contextmanager
+def atomic_output(path: Path) -> Iterator[BinaryIO]:
+    """Yield a binary file that replaces ``path`` only once it is complete."""
+    try:
+        mode = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        mode = _default_mode()
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            yield fh
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    with atomic_output(path) as fh:
+        fh.write(data)
+
+
+class OutputCapture:
+    def __init__(self, keep: Callable[[Path], bool], write_tree: bool) -> None:
+        self.keep = keep
+        self.write_tree = write_tree
+        self.files: dict[Path, bytes] = {}
+
+
+_capture: OutputCapture | None = None
+_written: set[Path] = set()
+
+
+@contextmanager
+def capture_outputs(keep: Callable[[Path], bool], write_tree: bool = True) -> Iterator[dict[Path, bytes]]:
+    """Hold every output ``keep`` accepts in memory while the block runs.
+
+    build_articles.py --bundle streams these into the bundle instead of
+    reading the tree back. With ``write_tree=False`` they never reach disk;
+    the read_output_* and glob_outputs helpers then see them instead.
+    """
+    global _capture
+    previous, _capture = _capture, OutputCapture(keep, write_tree)
+    try:
+        yield _capture.files
+    finally:
+        _capture = previous
+
+
+def held_outputs() -> list[Path]:
+    return sorted(_capture.files) if _capture is not None else []
+
+
+def _captured(path: Path) -> bytes | None:
+    if _capture is None:
+        return None
+    return _capture.files.get(path.resolve())
+
+
+def was_written(path: Path) -> bool:
+    """True when this process has (re)written ``path`` via write_if_changed."""
+    return path.resolve() in _written
+
+
+def writes_tree() -> bool:
+    return _capture is None or _capture.write_tree
+
+
+def read_output_bytes(path: Path) -> bytes:
+    data = _captured(path)
+    return path.read_bytes() if data is None else data
+
+
+def read_output_text(path: Path, encoding: str = "utf-8") -> str:
+    return read_output_bytes(path).decode(encoding)
+
+
+def output_exists(path: Path) -> bool:
+    return _captured(path) is not None or path.exists()
+
+
+def output_pending(path: Path) -> bool:
+    """True when the build holds bytes for ``path`` that are not on disk."""
+    data = _captured(path)
+    if data is None or _capture.write_tree:
+        return False
+    try:
+        return path.read_bytes() != data
+    except FileNotFoundError:
+        return True
+
+
+def glob_outputs(directory: Path, pattern: str) -> list[Path]:
+    """``directory.glob(pattern)`` plus held outputs not written to disk."""
+    found = set(directory.glob(pattern))
+    if _capture is not None and not _capture.write_tree:
+        recursive = pattern.startswith("**/")
+        tail = pattern[3:] if recursive else pattern
+        base = directory.resolve()
+        for path in _capture.files:
+            if not path.is_relative_to(base):
+                continue
+            rel = path.relative_to(base)
+            if rel.match(tail) and (recursive or len(rel.parts) == len(Path(tail).parts)):
+                found.add(directory / rel)
+    return sorted(found)
+
+
+def write_if_changed(path: Path, data: str | bytes, encoding: str = "utf-8") -> bool:
+    """Write ``data`` to ``path`` unless the file already holds the same bytes.
+
+    Returns True when the file was (re)written. Unchanged files keep their
+    mtime, which keeps sitemap ``<lastmod>`` values and deploy diffs stable.
+    While outputs are captured without tree writes, returns True when the
+    bytes differ from what the build or the tree last held.
+    """
+    payload = data.encode(encoding) if isinstance(data, str) else data
+    if _capture is not None and _capture.keep(path.resolve()):
+        key = path.resolve()
+        if not _capture.write_tree:
+            previous = read_output_bytes(path) if output_exists(path) else None
+            _capture.files[key] = payload
+            if previous != payload:
+                _written.add(key)
+            return previous != payload
+        _capture.files[key] = payload
+    try:
+        if path.stat().st_size == len(payload) and path.read_bytes() == payload:
+            return False
+    except FileNotFoundError:
+        pass
+    atomic_write_bytes(path, payload)
+    _written.add(path.resolve())
+    return True
+
+
+CACHE_DIR = Path(__file__).resolve().parents[1] / ".build-cache"
+
+
+def load_json_cache(name: str, version: str) -> dict:
+    """Load a persistent build cache, or an empty one if missing or stale."""
+    path = CACHE_DIR / f"{name}.json"
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if payload.get("version") != version:
+        return {}
+    return payload.get("entries", {})
+
+
+def save_json_cache(name: str, version: str, entries: dict) -> bool:
+    CACHE_DIR.mkdir(exist_ok=True)
+    payload = json.dumps({"version": version, "entries": entries}, sort_keys=True)
+    return write_if_changed(CACHE_DIR / f"{name}.json", payload)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Self-host the site fonts as WOFF2 subsets of the glyphs the pages use.
+
+Pages load Libre Baskerville and Space Mono from Google Fonts by default: a
+render-blocking stylesheet on one origin that then pulls the fonts from
+another. When the font files listed in FONT_FACES are in FONT_SOURCE_DIR and
+fontTools (with brotli) is installed, this stage collects every character in
+the text of the deployable pages, writes one WOFF2 subset per face to
+assets/fonts/, and swaps the Google Fonts links in every page for inline
+@font-face rules (font-display: swap) plus <link rel=preload> for the faces
+most pages need first. The templates in build_articles.py and
+generate_articles_index.py emit the same block through font_head().
+
+Subsets only grow: a face is rebuilt when a page uses a character the source
+font has but the committed subset lacks, so ordinary edits leave the font
+files untouched. Printable ASCII is always included.
+
+Usage:
+  python scripts/subset_fonts.py
+  python scripts/subset_fonts.py --source-dir ~/fonts/site
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+
+from page_budget import collect_pages
+from site_io import output_exists, read_output_bytes, read_output_text, write_if_changed
+
+try:
+    import brotli  # noqa: F401  (fontTools needs it for WOFF2)
+    from fontTools import subset, ttLib
+except ImportError:  # self-hosting is optional; pages keep Google Fonts
+    subset = ttLib = None
+
+ROOT = Path(__file__).resolve().parents[1]
+FONT_SOURCE_DIR = ROOT / "font-sources"
+FONT_OUT_DIR = ROOT / "assets" / "fonts"
+BASE_CODEPOINTS = frozenset(range(0x20, 0x7F))
+# (family, style, weight, source file, preload): the faces the Google Fonts
+# stylesheet requested. Preloaded faces are the body text and the headings.
+FONT_FACES = [
+    ("Libre Baskerville", "normal", 400, "LibreBaskerville-Regular.ttf", True),
+    ("Libre Baskerville", "normal", 700, "LibreBaskerville-Bold.ttf", False),
+    ("Libre Baskerville", "italic", 400, "LibreBaskerville-Italic.ttf", False),
+    ("Space Mono", "normal", 400, "SpaceMono-Regular.ttf", False),
+    ("Space Mono", "normal", 700, "SpaceMono-Bold.ttf", True),
+    ("Space Mono", "italic", 400, "SpaceMono-Italic.ttf", False),
+]
+GOOGLE_FONTS_HEAD = (
+    '<link rel="preconnect" href="https://fonts.googleapis.com">\n'
+    '  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n'
+    '  <link href="https://fonts.googleapis.com/css2?family=Libre+Baskerville:ital,wght@0,400;0,700;1,400'
+    '&family=Space+Mono:ital,wght@0,400;0,700;1,400&display=swap" rel="stylesheet">'
+)
+# Either form of the font block, as written by any earlier build.
+FONT_HEAD_RE = re.compile(
+    r'<link rel="preconnect" href="https://fonts\.googleapis\.com">\s*'
+    r'<link rel="preconnect" href="https://fonts\.gstatic\.com" crossorigin>\s*'
+    r'<link href="https://fonts\.googleapis\.com/css2\?[^"]*" rel="stylesheet">'
+    r'|(?:<link rel="preload" href="/assets/fonts/[^"]*"[^>]*>\s*)*<style data-fonts>.*?</style>',
+    re.DOTALL,
+)
+
+
+def face_name(family: str, style: str, weight: int) -> str:
+    slug = family.lower().replace(" ", "-")
+    return f"{slug}-{weight}{'-italic' if style == 'italic' else ''}.woff2"
+
+
+def font_outputs() -> dict[str, Path]:
+    """URL -> path of every self-hosted subset."""
+    return {
+        f"/assets/fonts/{face_name(family, style, weight)}": FONT_OUT_DIR / face_name(family, style, weight)
+        for family, style, weight, _, _ in FONT_FACES
+    }
+
+
+def font_head() -> str:
+    """The <head> font block: self-hosted once every subset exists."""
+    outputs = font_outputs()
+    if not all(output_exists(path) for path in outputs.values()):
+        return GOOGLE_FONTS_HEAD
+    lines = []
+    rules = []
+    for (family, style, weight, _, preload), url in zip(FONT_FACES, outputs):
+        if preload:
+            lines.append(f'<link rel="preload" href="{url}" as="font" type="font/woff2" crossorigin>')
+        rules.append(
+            f"    @font-face {{ font-family: '{family}'; font-style: {style}; font-weight: {weight}; "
+            f"font-display: swap; src: url({url}) format('woff2'); }}"
+        )
+    lines.append("<style data-fonts>\n" + "\n".join(rules) + "\n  </style>")
+    return "\n  ".join(lines)
+
+
+def apply_font_head(page_html: str) -> str:
+    head = font_head()
+    return FONT_HEAD_RE.sub(lambda m: head, page_html, count=1)
+
+
+class TextCollector(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.skip = 0
+        self.codepoints: set[int] = set()
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag in {"script", "style"}:
+            self.skip += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in {"script", "style"} and self.skip:
+            self.skip -= 1
+
+    def handle_data(self, data: str) -> None:
+        if not self.skip:
+            self.codepoints.update(ord(ch) for ch in data if not ch.isspace())
+
+
+def used_codepoints(pages: list[Path]) -> set[int]:
+    codepoints = set(BASE_CODEPOINTS)
+    for page in pages:
+        collector = TextCollector()
+        collector.feed(read_output_text(page))
+        codepoints |= collector.codepoints
+    return codepoints
+
+
+def cmap_codepoints(path: Path) -> set[int]:
+    if not output_exists(path):
+        return set()
+    return set(ttLib.TTFont(io.BytesIO(read_output_bytes(path))).getBestCmap())
+
+
+def write_subset(source: Path, out: Path, codepoints: set[int]) -> None:
+    options = subset.Options()
+    options.flavor = "woff2"
+    font = subset.load_font(str(source), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    buf = io.BytesIO()
+    subset.save_font(font, buf, options)
+    write_if_changed(out, buf.getvalue())
+
+
+def build_subsets(source_dir: Path, pages: list[Path]) -> None:
+    missing = [f for *_, f, _ in FONT_FACES if not (source_dir / f).is_file()]
+    if missing:
+        print(f"No self-hosted fonts: {', '.join(missing)} not in {source_dir}.")
+        return
+    if subset is None:
+        print("No self-hosted fonts: fontTools and brotli are not installed (pip install fonttools brotli).")
+        return
+    used = used_codepoints(pages)
+    FONT_OUT_DIR.mkdir(parents=True, exist_ok=True)
+    for (*_, filename, _), (url, out) in zip(FONT_FACES, font_outputs().items()):
+        # The existing subset is the cache: it is only rebuilt (as the union
+        # of old and new characters) when a page uses a character the source
+        # font has but the subset lacks.
+        have = cmap_codepoints(out)
+        new = (used & cmap_codepoints(source_dir / filename)) - have
+        if output_exists(out) and not new:
+            print(f"Unchanged {url} ({len(have)} characters)")
+            continue
+        write_subset(source_dir / filename, out, used | have)
+        print(f"Wrote {url} ({len(new)} new character(s), {len(read_output_bytes(out))} bytes)")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source-dir", type=Path, default=FONT_SOURCE_DIR, help="directory with the FONT_FACES files")
+    args = parser.parse_args(argv)
+
+    pages = collect_pages()
+    build_subsets(args.source_dir.expanduser(), pages)
+    rewritten = 0
+    for page in pages:
+        if write_if_changed(page, apply_font_head(read_output_text(page))):
+            rewritten += 1
+            print(f"Updated fonts in {page.relative_to(ROOT)}")
+    mode = "self-hosted" if font_head() != GOOGLE_FONTS_HEAD else "Google Fonts"
+    print(f"Fonts: {mode}; updated {rewritten} page(s), {len(pages) - rewritten} unchanged.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Replace embedded video players with click-to-load facades.
+
+A YouTube or LinkedIn <iframe> pulls in megabytes of third-party script as
+soon as the page loads. A facade is a plain link to the video, sized with the
+player's aspect ratio, showing a local thumbnail and a play button; the
+player iframe is only created when the link is clicked (/assets/js/
+video-facade.js), with the same title. Without JavaScript the link simply
+opens the video.
+
+Thumbnails are never fetched: drop a file named <provider>-<video id>.webp
+(or .jpg/.png) into assets/video-thumbnails/ and the next build uses it, e.g.
+youtube-OzGQa17yGgI.jpg or linkedin-7420036026310805326.jpg. Videos without
+one get a plain titled poster.
+"""
+from __future__ import annotations
+
+import hashlib
+import html
+import re
+from pathlib import Path
+
+from prune_css import page_features, prune_stylesheet
+
+ROOT = Path(__file__).resolve().parents[1]
+THUMBNAIL_DIR = ROOT / "assets" / "video-thumbnails"
+THUMBNAIL_SUFFIXES = (".webp", ".jpg", ".jpeg", ".png")
+FACADE_SCRIPT = "/assets/js/video-facade.js"
+DEFAULT_SIZE = (720, 405)
+
+# provider -> (embed URL pattern, player URL loaded on click, link target
+# without JavaScript); "{id}" is the captured video id.
+PROVIDERS: dict[str, tuple[re.Pattern[str], str, str]] = {
+    "youtube": (
+        re.compile(r"https?://(?:www\.)?youtube(?:-nocookie)?\.com/embed/([\w-]+)(?:[?#].*)?"),
+        "https://www.youtube-nocookie.com/embed/{id}?autoplay=1",
+        "https://www.youtube.com/watch?v={id}",
+    ),
+    "linkedin": (
+        re.compile(r"https?://(?:www\.)?linkedin\.com/embeds/publishingEmbed\.html\?articleId=(\d+)"),
+        "https://www.linkedin.com/embeds/publishingEmbed.html?articleId={id}",
+        "https://www.linkedin.com/embeds/publishingEmbed.html?articleId={id}",
+    ),
+}
+FACADE_MARK = 'class="video-facade"'
+# Iframes to replace, and facades from an earlier build, which are rendered
+# again so newly added thumbnails are picked up.
+VIDEO_RE = re.compile(
+    rf"<iframe\b([^>]*)>\s*</iframe>|<a {FACADE_MARK}([^>]*)>.*?</a>", re.IGNORECASE | re.DOTALL
+)
+ATTR_RE = re.compile(r"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+ASPECT_RE = re.compile(r"aspect-ratio:\s*(\d+)\s*/\s*(\d+)")
+HEAD_CLOSE_RE = re.compile(r"</head>", re.IGNORECASE)
+
+FACADE_CSS = """
+    .video-facade {
+      position: relative;
+      display: block;
+      width: 100%;
+      max-width: 720px;
+      margin: 1.5rem auto;
+      overflow: hidden;
+      border-radius: 8px;
+      background: #1f2a26;
+      color: #fff;
+      text-decoration: none;
+    }
+    .video-facade img {
+      width: 100%;
+      height: 100%;
+      margin: 0;
+      border: 0;
+      object-fit: cover;
+    }
+    .video-facade-title {
+      position: absolute;
+      left: 0;
+      right: 0;
+      bottom: 0;
+      padding: 0.6rem 0.9rem;
+      background: linear-gradient(transparent, rgba(0,0,0,0.7));
+      font-size: 0.9rem;
+      line-height: 1.4;
+    }
+    .video-facade-play {
+      position: absolute;
+      top: 50%;
+      left: 50%;
+      width: 68px;
+      height: 48px;
+      margin: -24px 0 0 -34px;
+      border-radius: 12px;
+      background: rgba(0,0,0,0.75);
+    }
+    .video-facade-play::after {
+      content: "";
+      position: absolute;
+      top: 14px;
+      left: 27px;
+      border-style: solid;
+      border-width: 10px 0 10px 17px;
+      border-color: transparent transparent transparent #fff;
+    }
+    .video-facade:hover .video-facade-play,
+    .video-facade:focus-visible .video-facade-play {
+      background: #c00;
+    }
+    .video-facade-frame {
+      display: block;
+      width: 100%;
+      max-width: 720px;
+      height: auto;
+      margin: 1.5rem auto;
+      border: 0;
+    }
+"""
+FACADE_HEAD = f'<style data-video-facade>{FACADE_CSS}  </style>\n  <script src="{FACADE_SCRIPT}" defer></script>'
+FACADE_HEAD_RE = re.compile(
+    rf'\s*<style data-video-facade>.*?</style>\s*<script src="{re.escape(FACADE_SCRIPT)}" defer></script>', re.DOTALL
+)
+
+
+def video_embed(src: str) -> tuple[str, str] | None:
+    """Return (provider, video id) for a known embed URL."""
+    for provider, (pattern, _, _) in PROVIDERS.items():
+        m = pattern.fullmatch(src.strip())
+        if m:
+            return provider, m.group(1)
+    return None
+
+
+def thumbnail_url(provider: str, video_id: str) -> str | None:
+    for suffix in THUMBNAIL_SUFFIXES:
+        path = THUMBNAIL_DIR / f"{provider}-{video_id}{suffix}"
+        if path.is_file():
+            return "/" + path.relative_to(ROOT).as_posix()
+    return None
+
+
+def facade_html(src: str, title: str, width: int = DEFAULT_SIZE[0], height: int = DEFAULT_SIZE[1]) -> str | None:
+    """Facade markup for a known embed URL, or None for anything else."""
+    embed = video_embed(src)
+    if embed is None:
+        return None
+    provider, video_id = embed
+    _, player, link = PROVIDERS[provider]
+    title = title.strip() or "Embedded video"
+    thumbnail = thumbnail_url(provider, video_id)
+    poster = (
+        f'<img src="{html.escape(thumbnail, quote=True)}" alt="" width="{width}" height="{height}" '
+        'loading="lazy" decoding="async" />'
+        if thumbnail
+        else ""
+    )
+    return (
+        f'<a {FACADE_MARK} href="{html.escape(link.format(id=video_id), quote=True)}" '
+        f'data-embed="{html.escape(player.format(id=video_id), quote=True)}" '
+        f'data-title="{html.escape(title, quote=True)}" '
+        f'style="aspect-ratio: {width} / {height}" '
+        f'aria-label="Play video: {html.escape(title, quote=True)}">'
+        f'{poster}<span class="video-facade-play" aria-hidden="true"></span>'
+        f'<span class="video-facade-title" aria-hidden="true">{html.escape(title)}</span></a>'
+    )
+
+
+def facade_version() -> str:
+    digest = hashlib.sha256(Path(__file__).read_bytes())
+    if THUMBNAIL_DIR.is_dir():
+        digest.update("\n".join(sorted(p.name for p in THUMBNAIL_DIR.iterdir())).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def parse_attrs(source: str) -> dict[str, str]:
+    return {k.lower(): html.unescape(v or v2) for k, v, v2 in ATTR_RE.findall(source)}
+
+
+def player_size(width: str, height: str) -> tuple[int, int]:
+    try:
+        size = int(width), int(height)
+    except ValueError:
+        return DEFAULT_SIZE
+    return size if size[0] > 0 and size[1] > 0 else DEFAULT_SIZE
+
+
+def replace_video_iframes(page_html: str, default_title: str) -> tuple[str, int]:
+    """Swap every known video iframe for a facade; return the page and count."""
+    replaced = 0
+
+    def sub(m: re.Match[str]) -> str:
+        nonlocal replaced
+        if m.group(1) is not None:
+            attrs = parse_attrs(m.group(1))
+            src, title = attrs.get("src", ""), attrs.get("title") or default_title
+            size = player_size(attrs.get("width", ""), attrs.get("height", ""))
+        else:
+            attrs = parse_attrs(m.group(2))
+            src, title = attrs.get("data-embed", ""), attrs.get("data-title", "")
+            aspect = ASPECT_RE.search(attrs.get("style", ""))
+            size = player_size(*aspect.groups()) if aspect else DEFAULT_SIZE
+        facade = facade_html(src, title, *size)
+        if facade is None:
+            return m.group(0)
+        replaced += m.group(1) is not None
+        return facade
+
+    return VIDEO_RE.sub(sub, page_html), replaced
+
+
+def add_facade_head(page_html: str) -> str:
+    """Put the facade styles and script in <head> of pages that have a facade.
+
+    The styles are written already pruned to what the page uses (as
+    prune_css.py would leave them) and replaced on every run, so a facade
+    that gains a thumbnail also gets its image rules back.
+    """
+    page_html = FACADE_HEAD_RE.sub("", page_html)
+    head_close = HEAD_CLOSE_RE.search(page_html)
+    if FACADE_MARK not in page_html or not head_close:
+        return page_html
+    head = FACADE_HEAD.replace(FACADE_CSS, prune_stylesheet(FACADE_CSS, page_features(page_html)))
+    return page_html[: head_close.start()] + "  " + head + "\n" + page_html[head_close.start() :]
+
@@ -0,0 +1,162 @@
+// Generated by scripts/make_service_worker.py; do not edit by hand.
+const PRECACHE = 'precache';
+const PAGES = 'pages';
+const IMAGES = 'images';
+const FONTS = 'fonts';
+const MANIFEST = [
+  {
+    "url": "/",
+    "revision": "e6ed2eb7af6c7797"
+  },
+  {
+    "url": "/articles/",
+    "revision": "956d98a810c76daf"
+  },
+  {
+    "url": "/assets/css/main.css",
+    "revision": "0d30706297af8e82"
+  },
+  {
+    "url": "/assets/css/highlight.css",
+    "revision": "13e7c681e41a40fd"
+  },
+  {
+    "url": "/assets/js/main.js",
+    "revision": "f1ea1e5308f0165a"
+  },
+  {
+    "url": "/articles/building-an-ai-research-agent/",
+    "revision": "3ae5d19203257540"
+  },
+  {
+    "url": "/articles/using-ai-for-mardi-gras-costume/",
+    "revision": "a997e85a64d719c9"
+  },
+  {
+    "url": "/articles/medicaid-intelligence-case-study/",
+    "revision": "b587c73fb1005d6c"
+  },
+  {
+    "url": "/articles/why-accurate-context-matters-more-than-clever-prompting/",
+    "revision": "e9efd4fbe5fd60b3"
+  },
+  {
+    "url": "/articles/validate-review-reimburse/",
+    "revision": "6aa16fba9c925e71"
+  }
+];
+const PAGE_MAX_ENTRIES = 30;
+const FONT_MAX_ENTRIES = 30;
+const IMAGE_MAX_ENTRIES = 60;
+const IMAGE_MAX_BYTES = 2097152;
+
+const cacheKey = (entry) => `${entry.url}?__rev=${entry.revision}`;
+const precacheKeys = new Map(MANIFEST.map((entry) => [entry.url, cacheKey(entry)]));
+
+self.addEventListener('install', (event) => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(PRECACHE);
+    // Only entries whose revision changed are fetched again.
+    await Promise.all(MANIFEST.map(async (entry) => {
+      const key = cacheKey(entry);
+      if (await cache.match(key)) return;
+      const response = await fetch(entry.url, { cache: 'no-cache' });
+      if (response.ok) await cache.put(key, response);
+    }));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(PRECACHE);
+    const current = new Set(precacheKeys.values());
+    for (const request of await cache.keys()) {
+      const url = new URL(request.url);
+      if (!current.has(url.pathname + url.search)) await cache.delete(request);
+    }
+    await self.clients.claim();
+  })());
+});
+
+async function trimCache(name, maxEntries) {
+  const cache = await caches.open(name);
+  const keys = await cache.keys();
+  for (const request of keys.slice(0, Math.max(0, keys.length - maxEntries))) {
+    await cache.delete(request);
+  }
+}
+
+async function staleWhileRevalidate(event, name, maxEntries, precacheKey) {
+  const cache = await caches.open(name);
+  // A precached page stands in until the page cache has its own copy.
+  const cached = await cache.match(event.request)
+    || (precacheKey && await (await caches.open(PRECACHE)).match(precacheKey));
+  const network = fetch(event.request).then((response) => {
+    // Cross-origin font requests come back opaque but are still cacheable.
+    if (response.ok || response.type === 'opaque') {
+      event.waitUntil(cache.put(event.request, response.clone()).then(() => trimCache(name, maxEntries)));
+    }
+    return response;
+  });
+  if (cached) {
+    event.waitUntil(network.catch(() => {}));
+    return cached;
+  }
+  return network;
+}
+
+async function cacheImage(request, response) {
+  // Chunked or compressed responses carry no usable content-length, so the
+  // body itself is measured; a declared length over the cap skips that.
+  if (Number(response.headers.get('content-length') || 0) > IMAGE_MAX_BYTES) {
+    await response.body?.cancel();
+    return;
+  }
+  const body = await response.blob();
+  if (body.size === 0 || body.size > IMAGE_MAX_BYTES) return;
+  const cache = await caches.open(IMAGES);
+  await cache.put(request, new Response(body, {
+    status: response.status,
+    statusText: response.statusText,
+    headers: response.headers,
+  }));
+  await trimCache(IMAGES, IMAGE_MAX_ENTRIES);
+}
+
+async function imageCacheFirst(event) {
+  const cache = await caches.open(IMAGES);
+  const cached = await cache.match(event.request);
+  if (cached) return cached;
+  const response = await fetch(event.request);
+  if (response.ok) event.waitUntil(cacheImage(event.request, response.clone()));
+  return response;
+}
+
+self.addEventListener('fetch', (event) => {
+  const { request } = event;
+  if (request.method !== 'GET') return;
+  const url = new URL(request.url);
+
+  if (url.origin === self.location.origin) {
+    const key = precacheKeys.get(url.pathname);
+    if (request.mode === 'navigate' || (url.pathname.startsWith('/articles/') && url.pathname.endsWith('/'))) {
+      event.respondWith(staleWhileRevalidate(event, PAGES, PAGE_MAX_ENTRIES, key));
+      return;
+    }
+    if (key) {
+      event.respondWith(caches.open(PRECACHE)
+        .then((cache) => cache.match(key))
+        .then((cached) => cached || fetch(request)));
+      return;
+    }
+    if (request.destination === 'image') {
+      event.respondWith(imageCacheFirst(event));
+    }
+    return;
+  }
+
+  if (url.hostname === 'fonts.googleapis.com' || url.hostname === 'fonts.gstatic.com') {
+    event.respondWith(staleWhileRevalidate(event, FONTS, FONT_MAX_ENTRIES));
+  }
+});
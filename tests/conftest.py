@@ -0,0 +1,43 @@
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+# The build scripts import each other as sibling modules.
+sys.path.insert(0, str(ROOT / "scripts"))
+OLD_COMMIT_DATE = "2020-01-02T12:00:00+00:00"
+
+
+@pytest.fixture
+def site(tmp_path: Path) -> Path:
+    """A copy of the working tree, committed in a fresh repo on an old date."""
+    files = subprocess.run(
+        ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout.split("\0")
+    copy = tmp_path / "site"
+    for rel in filter(None, files):
+        src = ROOT / rel
+        if src.is_file():
+            (copy / rel).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, copy / rel)
+    env = {**os.environ, "GIT_AUTHOR_DATE": OLD_COMMIT_DATE, "GIT_COMMITTER_DATE": OLD_COMMIT_DATE}
+    for cmd in (
+        ["git", "init", "-q"],
+        ["git", "add", "-A"],
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", "commit", "-q", "-m", "site"],
+    ):
+        subprocess.run(cmd, cwd=copy, env=env, check=True)
+    return copy
+
+
+def build(site: Path, *args: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "scripts/build_articles.py", *args], cwd=site, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
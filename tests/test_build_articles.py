@@ -0,0 +1,22 @@
+from pathlib import Path
+
+from conftest import build
+
+SCRATCH_DIRS = {".git", ".build-cache", ".build-reports"}
+
+
+def tree_stamps(site: Path) -> dict[str, int]:
+    return {
+        p.relative_to(site).as_posix(): p.stat().st_mtime_ns
+        for p in site.rglob("*")
+        if p.is_file() and p.relative_to(site).parts[0] not in SCRATCH_DIRS
+    }
+
+
+def test_second_build_writes_nothing(site):
+    source = sorted((site / "articles").glob("*/index.md"))[0]
+    source.write_text(source.read_text(encoding="utf-8") + "\nAn added closing line.\n", encoding="utf-8")
+    build(site)
+    before = tree_stamps(site)
+    build(site)
+    assert tree_stamps(site) == before
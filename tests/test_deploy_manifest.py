@@ -0,0 +1,37 @@
+import json
+
+import deploy_manifest
+
+
+def recorded(path):
+    return json.loads(path.read_text(encoding="utf-8"))["files"]
+
+
+def test_preview_leaves_the_baseline_alone(tmp_path, capsys):
+    baseline = tmp_path / "manifest.json"
+    baseline.write_text(deploy_manifest.dump_manifest({}), encoding="utf-8")
+
+    deploy_manifest.main(["--out", str(baseline)])
+    assert recorded(baseline) == {}
+    first = capsys.readouterr().out
+    deploy_manifest.main(["--out", str(baseline)])
+    assert capsys.readouterr().out == first
+
+    deploy_manifest.main(["--out", str(baseline), "--record"])
+    assert recorded(baseline) == deploy_manifest.build_manifest(deploy_manifest.ROOT)
+    capsys.readouterr()
+    deploy_manifest.main(["--out", str(baseline), "--json"])
+    assert json.loads(capsys.readouterr().out) == {"added": [], "changed": [], "deleted": []}
+
+
+def test_target_sync_records_its_manifest(tmp_path, capsys):
+    target = tmp_path / "target"
+    out = tmp_path / "manifest.json"
+    deploy_manifest.main(["--out", str(out), "--target", str(target)])
+    current = deploy_manifest.build_manifest(deploy_manifest.ROOT)
+    assert recorded(target / deploy_manifest.MANIFEST_NAME) == current
+    assert deploy_manifest.build_manifest(target) == current
+    assert not out.exists()
+    capsys.readouterr()
+    deploy_manifest.main(["--out", str(out), "--target", str(target), "--json"])
+    assert json.loads(capsys.readouterr().out) == {"added": [], "changed": [], "deleted": []}
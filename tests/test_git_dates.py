@@ -0,0 +1,72 @@
+import datetime as dt
+import os
+import subprocess
+from pathlib import Path
+
+import git_dates
+from conftest import build
+
+
+def commit(repo: Path, date: str, message: str) -> None:
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_DATE": f"{date}T12:00:00+00:00",
+        "GIT_COMMITTER_DATE": f"{date}T12:00:00+00:00",
+    }
+    subprocess.run(["git", "add", "-A"], cwd=repo, check=True)
+    subprocess.run(["git", "commit", "-q", "-m", message], cwd=repo, env=env, check=True)
+
+
+def make_repo(repo: Path) -> None:
+    subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+    subprocess.run(["git", "config", "user.name", "Test"], cwd=repo, check=True)
+    subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=repo, check=True)
+    page = repo / "articles" / "old-slug" / "index.md"
+    page.parent.mkdir(parents=True)
+    page.write_text("title: Post\n\nFirst draft, long enough to be detected as the same file.\n" * 5)
+    (repo / "index.html").write_text("<p>home</p>\n")
+    commit(repo, "2021-03-04", "add post")
+    page.write_text(page.read_text() + "An edit.\n")
+    commit(repo, "2022-05-06", "edit post")
+    new = repo / "articles" / "new-slug" / "index.md"
+    new.parent.mkdir(parents=True)
+    page.rename(new)
+    commit(repo, "2023-07-08", "rename post")
+    new.write_text(new.read_text() + "Another edit.\n")
+    commit(repo, "2024-09-10", "edit renamed post")
+
+
+def test_first_and_last_dates_follow_renames(tmp_path):
+    make_repo(tmp_path)
+    history = git_dates.read_history(tmp_path)
+    assert history["index.html"] == ["2021-03-04", "2021-03-04"]
+    assert history["articles/new-slug/index.md"] == ["2021-03-04", "2024-09-10"]
+    assert not git_dates.is_shallow(tmp_path)
+
+
+def test_shallow_clone_keeps_recorded_first_dates(tmp_path):
+    origin = tmp_path / "origin"
+    origin.mkdir()
+    make_repo(origin)
+    recorded = git_dates.read_history(origin)
+    clone = tmp_path / "clone"
+    subprocess.run(["git", "clone", "-q", "--depth", "1", origin.as_uri(), str(clone)], check=True)
+    assert git_dates.is_shallow(clone)
+
+    shallow = git_dates.read_history(clone)
+    assert shallow["articles/new-slug/index.md"] == ["2024-09-10", "2024-09-10"]
+    merged = git_dates.merge_recorded(shallow, recorded)
+    assert merged["articles/new-slug/index.md"] == ["2021-03-04", "2024-09-10"]
+    assert git_dates.merge_recorded(shallow, {})["articles/new-slug/index.md"] == ["", "2024-09-10"]
+
+
+def test_sitemap_dates_pages_rewritten_by_the_build(site):
+    source = sorted(p for p in (site / "articles").glob("*/index.md"))[0]
+    source.write_text(source.read_text(encoding="utf-8") + "\nAn added closing line.\n", encoding="utf-8")
+    build(site)
+    sitemap = (site / "sitemap.xml").read_text(encoding="utf-8")
+    url = f"https://scottlabbe.me/articles/{source.parent.name}/"
+    assert f"<loc>{url}</loc><lastmod>{dt.date.today().isoformat()}</lastmod>" in sitemap
+
+    build(site)
+    assert (site / "sitemap.xml").read_text(encoding="utf-8") == sitemap
@@ -0,0 +1,14 @@
+from make_redirects import build_rules, is_dynamic, resolve
+
+
+def test_other_origins_reach_old_paths_in_one_hop():
+    rules = build_rules()
+    origins = [source[: -len("/*")] for source, _, _ in rules if source.startswith("http://") and source.endswith("/*")]
+    paths = [(source, target) for source, target, _ in rules if source.startswith("/") and not is_dynamic(source)]
+    assert origins and paths
+    for origin in origins:
+        for source, target in paths:
+            final, hops = resolve(origin + source, rules)
+            assert hops == 1, origin + source
+            # resolve() reports targets on the canonical origin as paths.
+            assert final == target
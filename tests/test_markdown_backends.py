@@ -0,0 +1,46 @@
+import pytest
+
+from build_articles import MARKDOWN_BACKENDS, markdown_backend, render_markdown
+
+# Constructs where markdown engines commonly disagree. A backend must render
+# every one exactly like the builtin grammar, including the ones it leaves
+# literal.
+CONSTRUCTS = [
+    "_em_ and __bold__ and *em* and **bold**",
+    "Title\n=====",
+    "# Title #",
+    "- a\n  - b\n- c",
+    "- a\n\n- b",
+    "1. one\n2. two",
+    "see <https://example.com> now",
+    "line one  \nline two",
+    "    code here",
+    "> quote\ncontinued",
+    '[x](https://example.com "Title")',
+    r"\*not em\*",
+    "a <b>bold</b> word",
+    "```python\nprint('<hi>')\n```",
+    "![A](./a.png) ![B](./b.png)",
+    "---",
+]
+
+
+@pytest.mark.parametrize("text", CONSTRUCTS)
+def test_backends_match_the_builtin_grammar(text):
+    expected = render_markdown(text)
+    for name in MARKDOWN_BACKENDS:
+        assert markdown_backend(name)(text, None) == expected, name
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("a <b>bold</b> word", "<p>a &lt;b&gt;bold&lt;/b&gt; word</p>"),
+        ("*em* and **bold**", "<p><em>em</em> and <strong>bold</strong></p>"),
+        ("## Heading", "<h2>Heading</h2>"),
+        ("- a\n- b", "<ul>\n<li>a</li>\n<li>b</li>\n</ul>"),
+        ("> one\n> two", "<blockquote>\n<p>one</p>\n<p>two</p>\n</blockquote>"),
+    ],
+)
+def test_builtin_grammar(text, expected):
+    assert render_markdown(text) == expected
@@ -0,0 +1,75 @@
+"""Pathological markdown must render in time linear in its size.
+
+Each case renders a generated document at BASE_SIZE and at SCALE times that
+size. Quadratic behaviour would grow the time by about SCALE squared, so a
+case fails when the ratio exceeds SCALE * SLACK, or when the large document
+takes longer than MAX_SECONDS outright.
+"""
+import time
+from typing import Callable
+
+import pytest
+
+from build_articles import render_markdown
+
+BASE_SIZE = 20000
+SCALE = 8
+SLACK = 2.5
+REPEATS = 3
+MAX_SECONDS = 1.0
+# Timings below this are mostly noise; ratios are taken against it.
+MIN_SECONDS = 0.001
+
+
+def unit_repeat(unit: str) -> Callable[[int], str]:
+    def make(size: int) -> str:
+        return unit * max(1, size // len(unit))
+
+    return make
+
+
+def interior_whitespace(prefix: str) -> Callable[[int], str]:
+    def make(size: int) -> str:
+        return f"{prefix}a{' ' * size}b"
+
+    return make
+
+
+def chat_fence(size: int) -> str:
+    body = "\n".join(f"  line {i} of a long answer" for i in range(max(1, size // 24)))
+    return f"```chat\nuser: question\nmodel: start\n{body}\n```"
+
+
+CASES: dict[str, Callable[[int], str]] = {
+    "unmatched [": unit_repeat("[a "),
+    "unmatched ![": unit_repeat("![a "),
+    "unclosed link url": unit_repeat("[a](b "),
+    "unclosed image url": unit_repeat("![a](b "),
+    "unmatched *": unit_repeat("*a "),
+    "unmatched **": unit_repeat("**a "),
+    "unmatched backticks": unit_repeat("`a "),
+    "many code spans": unit_repeat("`a` "),
+    "many links": unit_repeat("[a](b) "),
+    "image run": unit_repeat("![a](b) "),
+    "single long paragraph": unit_repeat("lorem ipsum dolor sit amet "),
+    "heading whitespace run": interior_whitespace("# "),
+    "list item whitespace run": interior_whitespace("- "),
+    "long chat block": chat_fence,
+}
+
+
+def best_time(text: str) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        render_markdown(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+@pytest.mark.parametrize("make", CASES.values(), ids=CASES.keys())
+def test_render_time_grows_linearly(make):
+    small = best_time(make(BASE_SIZE))
+    large = best_time(make(BASE_SIZE * SCALE))
+    assert large < MAX_SECONDS
+    assert large / max(small, MIN_SECONDS) <= SCALE * SLACK